@@ -4,7 +4,7 @@ from proxmox_auto_installer.utils.tzd import ProxmoxTimezoneHelper
 from proxmox_auto_installer.constants import PROXMOX_ALLOWED_KEYBOARDS
 from proxmox_auto_installer.utils.country_codes import ProxmoxCountryCodeHelper
 
-timezone_list = ProxmoxTimezoneHelper()._timezones  # type: ignore
+timezone_list = frozenset(ProxmoxTimezoneHelper().get_timezones() or ())
 country_list = ProxmoxCountryCodeHelper().get_country_codes_list()
 
 COUNTRY_CODE_PATTERN = re_compile(r"^[a-z]{2}$")
@@ -87,7 +87,7 @@ class GlobalConfig(BaseModel):
     def validate_timezone_pattern(cls, timezone_value: str) -> str:
         if not TIMEZONE_PATTERN.match(timezone_value):
             raise ValueError(f"Invalid timezone pattern: {timezone_value}")
-        if not isinstance(timezone_list, list) or timezone_value not in timezone_list:
+        if not timezone_list or timezone_value not in timezone_list:
             raise ValueError(f"Invalid timezone: {timezone_value}")
         return timezone_value
 
@@ -5,20 +5,19 @@ CC_FILE = Path(__file__).parent / "ccodes.txt"
 
 def _get_country_codes() -> dict[str, str]:
     """Read the country codes file and return a dictionary of country codes to country names."""
-    if not CC_FILE.exists():
+    try:
+        file = CC_FILE.read_text(encoding="utf-8")
+    except FileNotFoundError:
         raise FileNotFoundError(f"Country codes file not found: {CC_FILE}")
-    with CC_FILE.open("r", encoding="utf-8") as f:
-        # read the file
-        file = f.read()
-        # split by new lines and filter out empty lines
-        lines = [line.strip() for line in file.split("\n") if line.strip()]
-        # split each line by comma and create a dictionary
-        country_codes: dict[str, str] = {}
-        for line in lines:
-            parts = line.split(":")
-            if len(parts) == 2:
-                code, name = parts
-                country_codes[code.strip()] = name.strip()
+    # split by new lines and filter out empty lines
+    lines = [line.strip() for line in file.split("\n") if line.strip()]
+    # split each line by comma and create a dictionary
+    country_codes: dict[str, str] = {}
+    for line in lines:
+        parts = line.split(":")
+        if len(parts) == 2:
+            code, name = parts
+            country_codes[code.strip()] = name.strip()
     return country_codes
 
 
@@ -1,4 +1,5 @@
 import os
+from sys import intern
 from pathlib import Path
 from locale import getlocale
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
@@ -8,16 +9,23 @@ from proxmox_auto_installer.utils.country_codes import ProxmoxCountryCodeHelper
 TZ_FILE = Path(__file__).parent / "tzs.txt"
 
 
-def _get_timezones() -> list[str]:
-    """Read the timezone file and return a list of timezones."""
-    if not TZ_FILE.exists():
+def _load_timezones() -> tuple[str, ...]:
+    """Read the timezone file once and return an interned tuple of timezones."""
+    try:
+        # utf-8-sig drops the BOM at the start of the file
+        contents = TZ_FILE.read_text(encoding="utf-8-sig")
+    except FileNotFoundError:
         raise FileNotFoundError(f"Timezone file not found: {TZ_FILE}")
-    with TZ_FILE.open("r", encoding="utf-8") as f:
-        # read the file
-        file = f.read()
-        # split by white space and filter out empty lines
-        timezones = [line.strip() for line in file.split("\n") if line.strip()]
-    return timezones
+    # split by white space to skip empty lines
+    return tuple(intern(tz) for tz in contents.split())
+
+
+_TIMEZONES = _load_timezones()
+
+
+def _get_timezones() -> tuple[str, ...]:
+    """Return the timezones loaded from the timezone file at import."""
+    return _TIMEZONES
 
 
 class ProxmoxTimezoneHelper:
@@ -30,7 +38,7 @@ class ProxmoxTimezoneHelper:
             cls._timezones = _get_timezones()
         return cls._instance
 
-    def get_timezones(self) -> list[str] | None:
+    def get_timezones(self) -> tuple[str, ...] | None:
         self._ensure_initialized()
         return self._timezones
 
@@ -62,5 +70,4 @@ class ProxmoxTimezoneHelper:
 
     def _ensure_initialized(self):
         if self._timezones is None:
-            self._timezones = self.get_timezones()
-            self._timezones = self.get_timezones()
+            self._timezones = _get_timezones()
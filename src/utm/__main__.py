@@ -1,14 +1,19 @@
 #!/usr/bin/python3.13
+import atexit
 import asyncio
 from sys import argv
+from shutil import which
+from importlib.util import find_spec
+from queue import SimpleQueue
 from pathlib import Path
-from os import environ, getenv
+from threading import Event, Lock, Thread
+from os import O_CLOEXEC, O_CREAT, O_TRUNC, O_WRONLY, close, environ, fspath, fsync, getenv, replace, write
+from os import open as os_open
+from typing import Any, Literal
 from dataclasses import dataclass
-from re import search, sub, M, compile
-from socket import gethostname, gethostbyname
-from collections.abc import Mapping, Sequence
-from logging.handlers import RotatingFileHandler
-from logging import INFO, WARNING, Logger, Formatter, StreamHandler, DEBUG, getLogger
+from re import compile
+from collections.abc import Callable, Mapping, Sequence
+from logging import ERROR, INFO, WARNING, Logger, LogRecord, Formatter, StreamHandler, DEBUG, getLogger
 
 # DO NOT IMPORT ANYTHING FROM UTM!
 
@@ -17,33 +22,50 @@ logger = getLogger("safe_pc.post_startup")
 
 CWD = "/opt/safe_pc"
 BACKUP_LOG_COUNT = 5  # in days
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 10 MiB
+LOG_BUFFER_CAPACITY = 512  # records held before they are written to the log file
+LOG_FLUSH_INTERVAL = 1.0  # seconds, longest a buffered record waits before it is written
 ENV_P = Path("/etc/environment")
 BASH_RC = Path("/etc/bash.bashrc")
+VENV_PATH = Path(CWD) / "venv"
 SCRIPT_PATH = Path(argv[0]).resolve()
+LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
+_LOG_FILE = LOG_DIR / "safe_pc.log"
+_TEST_LOG_FILE = LOG_DIR / "safe_pc_tests.log"
 
+_logging_lock = Lock()
+_logging_configured = False
 
-def get_local_ip() -> str:
-    """Gets the local IP address of the machine.
 
-    Returns:
-        str: The local IP address.
-    """
-    env_ip = environ.get("HOST_IP")
-    if env_ip:
-        return env_ip
-    hostname = gethostname()
-    local_ip = gethostbyname(hostname)
-    return local_ip
+# Reusable Exports - Moved here to prevent circular imports - Clearly should go elsewhere
+
+# env flags are read once at import, call refresh_env_flags() after changing them in-process
+_ENV_FLAG_KEYS = frozenset({"CAPSTONE_TESTING", "CAPSTONE_PRODUCTION", "CAPSTONE_VERBOSE"})
+_IS_TESTING = _IS_PRODUCTION = _IS_VERBOSE = False
+
+
+def _env_flag(key: str) -> bool:
+    return getenv(key, "0") == "1"
+
+
+def refresh_env_flags() -> None:
+    """Re-read the cached CAPSTONE_* flags from the environment, i.e. after a test sets them."""
+    global _IS_TESTING, _IS_PRODUCTION, _IS_VERBOSE
+    _IS_TESTING = _env_flag("CAPSTONE_TESTING")
+    _IS_PRODUCTION = _env_flag("CAPSTONE_PRODUCTION")
+    _IS_VERBOSE = _env_flag("CAPSTONE_VERBOSE")
+
+
+refresh_env_flags()
 
 
-# Reusable Exports - Moved here to prevent circular imports - Clearly should go elsewhere
 def is_testing() -> bool:
     """Check if the code is running in a testing environment.
 
     Returns:
         bool: True if running tests, False otherwise.
     """
-    return getenv("CAPSTONE_TESTING", "0") == "1"
+    return _IS_TESTING
 
 
 def is_production() -> bool:
@@ -52,7 +74,7 @@ def is_production() -> bool:
     Returns:
         bool: True if running in production, False otherwise.
     """
-    return getenv("CAPSTONE_PRODUCTION", "0") == "1"
+    return _IS_PRODUCTION
 
 
 def is_verbose() -> bool:
@@ -61,77 +83,104 @@ def is_verbose() -> bool:
     Returns:
         bool: True if verbose mode is enabled, False otherwise.
     """
-    return getenv("CAPSTONE_VERBOSE", "0") == "1"
+    return _IS_VERBOSE
 
 
-def set_env_variable(key: str, value: str, system_wide: bool = True):
-    env_path = Path(ENV_P)
-    bashrc_path = Path(BASH_RC)
-    env_path.touch(exist_ok=True)
-    bashrc_path.touch(exist_ok=True)
+def set_env_variables(variables: Mapping[str, str], system_wide: bool = True):
+    """Set several environment variables, persisting them to /etc/environment and bashrc.
 
-    def update_file(path: Path, pattern: str, new_line: str):
+    Each file is read and written at most once however many variables are set.
+
+    Args:
+        variables: The variable names mapped to their values.
+        system_wide: Also write the variables to /etc/environment.
+    """
+    ENV_P.touch(exist_ok=True)
+    BASH_RC.touch(exist_ok=True)
+
+    def update_file(path: Path, lead: str, new_lines: dict[str, str]):
         content = path.read_text()
-        if search(pattern, content, flags=M):
-            updated = sub(pattern, new_line, content, flags=M)
-            if updated != content:
-                path.write_text(updated)
-        else:
-            with path.open("a") as f:
-                f.write(f"\n{new_line}\n")
+        lines = content.split("\n")
+        found: set[str] = set()
+        # KEY=... or export KEY=..., split on the first = rather than running a regex per variable
+        for i, line in enumerate(lines):
+            if line.startswith(lead):
+                key, sep, _ = line[len(lead) :].partition("=")
+                if sep and key in new_lines:
+                    lines[i] = new_lines[key]
+                    found.add(key)
+
+        updated = "\n".join(lines) if found else content
+        updated += "".join(f"\n{new_line}\n" for key, new_line in new_lines.items() if key not in found)
+        if updated != content:
+            path.write_text(updated)
 
     if system_wide:
-        env_line = f'{key}="{value}"'
-        env_pattern = rf"^{key}=.*$"
-        update_file(env_path, env_pattern, env_line)
+        update_file(ENV_P, "", {key: f'{key}="{value}"' for key, value in variables.items()})
 
     # Update bashrc
-    bash_line = f'export {key}="{value}"'
-    bash_pattern = rf"^export {key}=.*$"
-    update_file(bashrc_path, bash_pattern, bash_line)
+    update_file(BASH_RC, "export ", {key: f'export {key}="{value}"' for key, value in variables.items()})
 
     # Set in current environment if not already set
-    if getenv(key, "") != value:
-        environ[key] = value
+    changed = {key for key, value in variables.items() if getenv(key, "") != value}
+    for key in changed:
+        environ[key] = variables[key]
+    if not changed.isdisjoint(_ENV_FLAG_KEYS):
+        refresh_env_flags()
 
 
-def remove_env_variable(key: str, system_wide: bool = True):
-    env_path = Path(ENV_P)
-    bashrc_path = Path(BASH_RC)
+def set_env_variable(key: str, value: str, system_wide: bool = True):
+    set_env_variables({key: value}, system_wide=system_wide)
 
-    def remove_from_file(path: Path, pattern: str):
-        content = path.read_text()
-        updated = sub(pattern, "", content, flags=M)
-        if updated != content:
-            path.write_text(updated)
+
+def remove_env_variable(key: str, system_wide: bool = True):
+    def remove_from_file(path: Path, prefix: str):
+        lines = path.read_text().split("\n")
+        kept = [line for line in lines if not line.startswith(prefix)]
+        if len(kept) != len(lines):
+            path.write_text("\n".join(kept))
 
     if system_wide:
-        env_pattern = rf"^{key}=.*$\n?"
-        remove_from_file(env_path, env_pattern)
+        remove_from_file(ENV_P, f"{key}=")
 
     # Remove from bashrc
-    bash_pattern = rf"^export {key}=.*$\n?"
-    remove_from_file(bashrc_path, bash_pattern)
+    remove_from_file(BASH_RC, f"export {key}=")
 
     # Remove from current environment
     if key in environ:
         del environ[key]
+        if key in _ENV_FLAG_KEYS:
+            refresh_env_flags()
 
 
 def _project_log_dir() -> Path:
     """Get the project's log directory, creating it if necessary."""
-    log_dir = Path(__file__).resolve().parents[2] / "logs"
-    if not log_dir.exists():
-        log_dir.mkdir(parents=True, exist_ok=True)
-    return log_dir
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    return LOG_DIR
 
 
 def _project_log_file() -> Path:
     """Get the project's log file path."""
-    log_file = "safe_pc_tests" if is_testing() else "safe_pc"
-    log_dir = _project_log_dir()
-    log_path = log_dir / f"{log_file}.log"
-    return log_path
+    _project_log_dir()
+    return _TEST_LOG_FILE if is_testing() else _LOG_FILE
+
+
+def _start_periodic_flush(handler: Any, interval: float = LOG_FLUSH_INTERVAL) -> Callable[[], None]:
+    """Flush `handler` every `interval` seconds on a daemon thread.
+
+    Keeps buffered records from sitting in memory in long running processes, i.e. the back end server.
+
+    Returns:
+        A function that stops the thread.
+    """
+    stopped = Event()
+
+    def run() -> None:
+        while not stopped.wait(interval):
+            handler.flush()
+
+    Thread(target=run, name="safe_pc-log-flush", daemon=True).start()
+    return stopped.set
 
 
 def setup_logging(level: int = INFO, log_file: str = "safe_pc") -> Logger:
@@ -139,51 +188,79 @@ def setup_logging(level: int = INFO, log_file: str = "safe_pc") -> Logger:
     Configure root logging once for the entire process.
     Returns the package logger for convenience.
 
+    Subsequent calls are no-ops that return the logger, so handlers (and their open
+    file descriptors) are never rebuilt.
+
     Args:
         level: The level to set, i.e. INFO, DEBUG, ERROR, etc.
 
     Returns:
         The configured root-level logger
     """
+    global _logging_configured
 
-    # determine if we need DEBUG level logging
-    if level != DEBUG and is_testing() or is_verbose():
-        level = DEBUG
+    with _logging_lock:
+        if _logging_configured:
+            return getLogger(log_file)
 
-    log_path = _project_log_file()
-    fmt = Formatter("%(asctime)s - [%(name)s] - %(levelname)s - %(message)s")
+        # logging.handlers pulls in socket, pickle and friends, only pay for it when logging is set up
+        from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 
-    file_handler = RotatingFileHandler(
-        log_path,
-        mode="a" if not is_testing() else "w",
-        backupCount=BACKUP_LOG_COUNT,
-    )
-    file_handler.setFormatter(fmt)
+        # determine if we need DEBUG level logging
+        if level != DEBUG and is_testing() or is_verbose():
+            level = DEBUG
 
-    # Console handler
-    stream_handler = StreamHandler()
-    stream_handler.setFormatter(fmt)
+        log_path = _project_log_file()
+        fmt = Formatter("%(asctime)s - [%(name)s] - %(levelname)s - %(message)s")
 
-    # config logger
-    root = getLogger()
-    root.handlers.clear()
-    root.name = log_file
-    root.setLevel(level)
-    root.addHandler(file_handler)
-    root.addHandler(stream_handler)
+        # RotatingFileHandler forces append mode when rotating by size, tests start from an empty file instead
+        file_handler = RotatingFileHandler(
+            log_path,
+            mode="a" if not is_testing() else "w",
+            maxBytes=LOG_MAX_BYTES if not is_testing() else 0,
+            backupCount=BACKUP_LOG_COUNT,
+            delay=True,
+        )
+        file_handler.setFormatter(fmt)
+
+        # write the log file in batches rather than once per record, errors are written out right away
+        buffered_file_handler = MemoryHandler(LOG_BUFFER_CAPACITY, flushLevel=ERROR, target=file_handler)
+
+        # Console handler
+        stream_handler = StreamHandler()
+        stream_handler.setFormatter(fmt)
+
+        # log calls only enqueue the record, a background listener does the file/console I/O
+        log_queue: SimpleQueue[LogRecord] = SimpleQueue()
+        listener = QueueListener(log_queue, buffered_file_handler, stream_handler, respect_handler_level=True)
+        listener.start()
+        stop_periodic_flush = _start_periodic_flush(buffered_file_handler)
+        # atexit runs these last first, drain the queue and only then write out the buffered records
+        atexit.register(buffered_file_handler.flush)
+        atexit.register(stop_periodic_flush)
+        atexit.register(listener.stop)
+
+        # config logger
+        root = getLogger()
+        root.handlers.clear()
+        root.name = log_file
+        root.setLevel(level)
+        root.addHandler(QueueHandler(log_queue))
+
+        _logging_configured = True
 
     return getLogger(log_file)
 
 
 @dataclass
 class CmdResult:
-    stdout: str
-    stderr: str
+    stdout: str | bytes | None
+    stderr: str | bytes | None
     returncode: int | None
 
 
 class CommandError(RuntimeError):
-    def __init__(self, args: Sequence[str], rc: int | None, stdout: str, stderr: str):
+    def __init__(self, args: Sequence[str], rc: int | None, stdout: str | bytes | None, stderr: str | bytes | None):
         super().__init__(f"Command failed ({rc}): {' '.join(map(str, args))}")
         self.args_list = list(args)
         self.returncode = rc
@@ -192,6 +269,29 @@ class CommandError(RuntimeError):
 
 
 LOG_LINE_PATTERN = compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} - \[")
+_match_log_line = LOG_LINE_PATTERN.match
+
+
+def _is_log_line(text: str) -> bool:
+    """Check if `text` starts with our log prefix, i.e. `2025-01-01 12:00:00,000 - [`.
+
+    The timestamp is fixed width, checking a few separator positions rejects almost
+    every other line without entering the regex engine.
+    """
+    return (
+        len(text) >= 27
+        and text[4] == "-"
+        and text[7] == "-"
+        and text[10] == " "
+        and text[13] == ":"
+        and text[16] == ":"
+        and _match_log_line(text) is not None
+    )
+
+
+STREAM_CHUNK_SIZE = 64 * 1024  # 64 KiB
+# the pipe transport pauses once a StreamReader holds 2x its limit, the 64 KiB default throttles chatty commands
+STREAM_BUFFER_LIMIT = 1024 * 1024  # 1 MiB
 
 
 async def stream_output(
@@ -200,22 +300,58 @@ async def stream_output(
     level: int,
     logger: Logger,
 ) -> None:
-    while True:
-        line = await stream.readline()
-        if not line:
-            break
-        text = line.decode(errors="replace").rstrip()
-        lines.append(text)
-        if not text.strip():
-            continue
+    # bind everything the per-line loop touches once, up front
+    read = stream.read
+    append = lines.append
+    log = logger.log
+
+    if level == WARNING:
+        # Detect already-prefixed log lines and print them as-is
+        def handle(text: str) -> None:
+            if _is_log_line(text):
+                print(text, flush=True)
+            else:
+                log(WARNING, text)
 
-        # Detect already-prefixed log lines and print accordingly
-        if level == INFO:
-            logger.log(level, text)
-        elif level == WARNING and LOG_LINE_PATTERN.match(text):
-            print(text, flush=True)
-        else:
-            logger.log(level, text)
+    else:
+
+        def handle(text: str) -> None:
+            log(level, text)
+
+    # read in chunks and split lines locally, one event loop round trip per chunk instead of per line
+    tail = b""
+    while chunk := await read(STREAM_CHUNK_SIZE):
+        data = tail + chunk
+        end = data.rfind(b"\n")
+        if end < 0:
+            tail = data
+            continue
+        tail = data[end + 1 :]
+
+        # a newline never falls inside a multi-byte UTF-8 sequence, decode all complete lines in one call
+        for line in data[:end].decode(errors="replace").split("\n"):
+            text = line.rstrip()
+            append(text)
+            # rstrip() leaves nothing behind for whitespace-only lines
+            if text:
+                handle(text)
+
+    # output that doesn't end with a newline
+    if tail:
+        text = tail.decode(errors="replace").rstrip()
+        append(text)
+        if text:
+            handle(text)
+
+
+def _decode_output(data: bytes) -> str:
+    """Decode a command's whole output in one call, normalized the same way `stream_output` collects it."""
+    if not data:
+        return ""
+    text = data.decode(errors="replace")
+    if text.endswith("\n"):
+        text = text[:-1]
+    return "\n".join(line.rstrip() for line in text.split("\n"))
 
 
 async def run_command_async(
@@ -224,32 +360,82 @@ async def run_command_async(
     env: Mapping[str, str] | None = None,
     check: bool = True,
     logger: Logger | None = None,
+    capture: Literal["text", "bytes", "none"] = "text",
+    stream_mode: Literal["line", "batch"] = "line",
+    close_fds: bool = True,
 ) -> CmdResult:
-    cmd = tuple(str(a) for a in args)
+    """Run a command asynchronously.
+
+    Args:
+        *args: The command and its arguments.
+        cwd: The working directory to run the command in.
+        env: The environment for the command, defaults to the current environment.
+        check: Raise a CommandError if the command exits non-zero.
+        logger: The logger output lines are streamed to in "text" mode.
+        capture: "text" decodes and logs output line by line, "bytes" returns the raw
+            output without decoding or logging it, "none" discards the output entirely.
+        stream_mode: How "text" output is logged, "line" logs each line as it arrives,
+            "batch" logs all of stdout and all of stderr as one record each once the
+            command exits. Use it for long, non-interactive commands like apt or pip.
+        close_fds: Close inherited file descriptors in the child. Our own descriptors are
+            created non-inheritable, so short, frequently polled commands can skip it.
+
+    Returns:
+        CmdResult: The command's output (None when not captured) and return code.
+    """
+    cmd = list(map(fspath, args))
+
+    # a plain dict is handed to the subprocess as-is, only other mappings need a copy
+    if env and not isinstance(env, dict):
+        env = dict(env)
 
+    pipe = asyncio.subprocess.DEVNULL if capture == "none" else asyncio.subprocess.PIPE
     proc = await asyncio.create_subprocess_exec(
         *cmd,
-        cwd=str(cwd) if cwd else None,
-        env=dict(env) if env else None,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
+        cwd=fspath(cwd) if cwd else None,
+        env=env or None,
+        stdout=pipe,
+        stderr=pipe,
+        limit=STREAM_BUFFER_LIMIT,
+        close_fds=close_fds,
     )
 
-    stdout_lines: list[str] = []
-    stderr_lines: list[str] = []
-
-    if logger is None:
-        logger = getLogger("safe_pc.run_command_async")
-        logger.propagate = False
+    stdout: str | bytes | None
+    stderr: str | bytes | None
+
+    if capture == "text":
+        if logger is None:
+            logger = getLogger("safe_pc.run_command_async")
+            logger.propagate = False
+
+        if stream_mode == "batch":
+            # nothing is logged until the command exits, so skip the line splitting entirely and
+            # decode each stream once from the raw bytes
+            raw_stdout, raw_stderr = await proc.communicate()
+            rc = proc.returncode
+            stdout = _decode_output(raw_stdout)
+            stderr = _decode_output(raw_stderr)
+
+            if stdout.strip():
+                logger.log(INFO, stdout)
+            if stderr.strip():
+                logger.log(WARNING, stderr)
+        else:
+            stdout_lines: list[str] = []
+            stderr_lines: list[str] = []
 
-    await asyncio.gather(
-        stream_output(proc.stdout, stdout_lines, INFO, logger),  # type: ignore
-        stream_output(proc.stderr, stderr_lines, WARNING, logger),  # type: ignore
-    )
+            await asyncio.gather(
+                stream_output(proc.stdout, stdout_lines, INFO, logger),  # type: ignore
+                stream_output(proc.stderr, stderr_lines, WARNING, logger),  # type: ignore
+            )
 
-    rc = await proc.wait()
-    stdout = "\n".join(stdout_lines)
-    stderr = "\n".join(stderr_lines)
+            rc = await proc.wait()
+            stdout = "\n".join(stdout_lines)
+            stderr = "\n".join(stderr_lines)
+    else:
+        # "bytes" reads both pipes without decoding, "none" has nothing to read
+        stdout, stderr = await proc.communicate()
+        rc = proc.returncode
 
     if check and rc != 0:
         raise CommandError(cmd, rc, stdout, stderr)
@@ -264,10 +450,21 @@ async def run_command_async(
 # Post Startup --------------
 
 
+_is_proxmox: bool | None = None
+
+
 async def is_proxmox() -> bool:
-    cmd = "pveversion"
-    result = await run_command_async(cmd, cwd=CWD, check=False)
-    return result.returncode == 0
+    # the answer can't change while we're running, only spawn pveversion once per process
+    global _is_proxmox
+
+    if _is_proxmox is None:
+        cmd = "pveversion"
+        if which(cmd) is None:
+            _is_proxmox = False
+        else:
+            result = await run_command_async(cmd, cwd=CWD, check=False, capture="none")
+            _is_proxmox = result.returncode == 0
+    return _is_proxmox
 
 
 def only_on_proxmox(func):  # type: ignore
@@ -283,12 +480,11 @@ def only_on_proxmox(func):  # type: ignore
 def remove_enterprise_repo():
     repo_file = Path("/etc/apt/sources.list.d/pve-enterprise.sources")
     try:
-        if repo_file.exists():
-            logger.info("Removing enterprise repository file")
-            repo_file.unlink()
-            logger.info(f"  Removed enterprise repository file: {repo_file}")
-        else:
-            logger.info("  Enterprise repository file not found, skipping removal.")
+        logger.info("Removing enterprise repository file")
+        repo_file.unlink()
+        logger.info(f"  Removed enterprise repository file: {repo_file}")
+    except FileNotFoundError:
+        logger.info("  Enterprise repository file not found, skipping removal.")
     except Exception as e:
         logger.error(f"  Failed to remove enterprise repository file: {e}")
 
@@ -296,35 +492,64 @@ def remove_enterprise_repo():
 def remove_ceph_repo():
     repo_file = Path("/etc/apt/sources.list.d/ceph.sources")
     try:
-
-        if repo_file.exists():
-            logger.info("Removing Ceph repository file")
-            repo_file.unlink()
-            logger.info(f"  Removed Ceph repository file: {repo_file}")
-        else:
-            logger.info(f"  No Ceph repository file found at: {repo_file}")
+        logger.info("Removing Ceph repository file")
+        repo_file.unlink()
+        logger.info(f"  Removed Ceph repository file: {repo_file}")
+    except FileNotFoundError:
+        logger.info(f"  No Ceph repository file found at: {repo_file}")
     except Exception as e:
         logger.error(f"  Failed to remove Ceph repository file: {e}")
 
 
-def set_proxmox_repo_to_community():
-    # File /etc/apt/sources.list.d/proxmox.sources
-    # https://pve.proxmox.com/wiki/Package_Repositories
-
-    repo_str = """
-Types: deb
+# File /etc/apt/sources.list.d/proxmox.sources
+# https://pve.proxmox.com/wiki/Package_Repositories
+PROXMOX_COMMUNITY_REPO = b"""Types: deb
 URIs: http://download.proxmox.com/debian/pve
 Suites: trixie
 Components: pve-no-subscription
 Signed-By: /usr/share/keyrings/proxmox-archive-keyring.gpg
+"""
+
+
+def _atomic_write_bytes(path: Path, data: bytes, mode: int = 0o644) -> None:
+    """Write `data` to `path` so readers see either the old or the new file, never a partial one.
+
+    Args:
+        path: The file to write.
+        data: The bytes to write.
+        mode: The permissions for a newly created file.
     """
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        fd = os_open(tmp, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, mode)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[write(fd, view) :]
+            fsync(fd)
+        finally:
+            close(fd)
+        replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def set_proxmox_repo_to_community():
     repo_file = Path("/etc/apt/sources.list.d/proxmox.sources")
     logger.info("Setting Proxmox repository to community edition")
     try:
+        # leave the file (and its mtime, which apt compares) alone when it's already up to date
+        try:
+            if repo_file.read_bytes() == PROXMOX_COMMUNITY_REPO:
+                logger.info(f"  Proxmox repository is already set to community edition in {repo_file}")
+                return
+        except FileNotFoundError:
+            pass
+
         # Write the new repository configuration
-        with open(repo_file, mode="w") as f:
-            f.write(repo_str.strip() + "\n")
-            logger.info(f"  Set Proxmox repository to community edition in {repo_file}")
+        _atomic_write_bytes(repo_file, PROXMOX_COMMUNITY_REPO)
+        logger.info(f"  Set Proxmox repository to community edition in {repo_file}")
 
     except Exception as e:
         logger.error(f"  Failed to set Proxmox repository: {e}")
@@ -335,7 +560,7 @@ async def update_and_upgrade_apt():
     env = {"DEBIAN_FRONTEND": "noninteractive"}
     try:
         logger.info("Updating and upgrading apt repositories...")
-        await run_command_async("apt", "update", "-y", env=env)
+        await run_command_async("apt", "update", "-y", env=env, stream_mode="batch")
         await run_command_async(
             "apt",
             "full-upgrade",
@@ -345,6 +570,7 @@ async def update_and_upgrade_apt():
             "-o",
             "Dpkg::Options::=--force-confdef",
             env=env,
+            stream_mode="batch",
         )
         logger.info("  Successfully updated and upgraded apt repositories.")
     except CommandError as e:
@@ -353,7 +579,7 @@ async def update_and_upgrade_apt():
 
 def set_production_env():
     # Check current in-memory environment first
-    if getenv("CAPSTONE_PRODUCTION", "0") == "1":
+    if is_production():
         logger.info("CAPSTONE_PRODUCTION is already set to '1' in current environment. Skipping.")
         return
 
@@ -372,9 +598,12 @@ async def dl_opnsense_iso():
 async def install_pythonvenv():
     logger.info("Checking for python3-venv installation...")
     try:
-        await run_command_async("python3", "-m", "venv", "--help")
+        # this runs under the system python3, look the modules up here instead of spawning it again,
+        # Debian ships ensurepip in python3-venv so venv alone isn't enough
+        if which("python3") is None or find_spec("venv") is None or find_spec("ensurepip") is None:
+            raise ValueError("python3-venv is not installed.")
         # sure the /opt/safe_pc/venv/bin/pip exists
-        venv_bin = Path(CWD) / "venv" / "bin"
+        venv_bin = VENV_PATH / "bin"
         # check for pip, pip3, pip3.X etc. in the venv bin directory
         if not venv_bin.exists() or not any(venv_bin.glob("pip*")):
             raise ValueError("python3-venv is not fully installed (missing pip in venv/bin).")
@@ -391,13 +620,12 @@ async def install_pythonvenv():
 
 
 async def create_venv():
-    venv_path = Path(CWD) / "venv"
-    if venv_path.exists():
+    if VENV_PATH.exists():
         logger.info("Python virtual environment already exists, skipping creation.")
         return
 
     logger.info("Creating Python virtual environment...")
-    result = await run_command_async("python3", "-m", "venv", str(venv_path), check=False)
+    result = await run_command_async("python3", "-m", "venv", str(VENV_PATH), check=False)
 
     if result.returncode == 0:
         logger.info("  Created Python virtual environment successfully.")
@@ -407,15 +635,16 @@ async def create_venv():
 
 async def install_requirements():
     logger.info("Installing Python requirements in virtual environment...")
-    venv_path = Path(CWD) / "venv"
-    pip_path = venv_path / "bin" / "pip"
+    pip_path = VENV_PATH / "bin" / "pip"
     requirements_file = Path(CWD) / "requirements.txt"
 
     if not requirements_file.exists():
         logger.error(f"  Requirements file not found at {requirements_file}.")
         return
 
-    result = await run_command_async(str(pip_path), "install", "-r", str(requirements_file), check=False)
+    result = await run_command_async(
+        str(pip_path), "install", "-r", str(requirements_file), check=False, stream_mode="batch"
+    )
 
     if result.returncode == 0:
         logger.info("  Installed Python requirements successfully.")
@@ -427,9 +656,10 @@ async def install_safe_pc_via_pip():
     # install -e so modules imports work correctly
 
     logger.info("Installing SAFE PC via pip in virtual environment...")
-    venv_path = Path(CWD) / "venv"
-    pip_path = venv_path / "bin" / "pip"
-    result = await run_command_async(str(pip_path), "install", "-e", CWD, check=False, logger=logger)
+    pip_path = VENV_PATH / "bin" / "pip"
+    result = await run_command_async(
+        str(pip_path), "install", "-e", CWD, check=False, logger=logger, stream_mode="batch"
+    )
     if result.returncode == 0:
         logger.info("  Successfully installed SAFE PC via pip in virtual environment.")
     else:
@@ -454,6 +684,7 @@ async def create_vm_data_pool_if_missing():
             "rpool/vm-data",
         ],
         check=False,
+        capture="none",
     )
 
     if result.returncode != 0:
@@ -502,33 +733,60 @@ async def create_opnsense_vm():
     )
 
 
-# group and loop
+# group and loop - steps within a stage don't depend on each other and run concurrently,
+# stages run in order since each one needs what the previous ones set up
 post_startup_steps = (
-    (set_production_env, "Setting production environment variable"),
-    (remove_enterprise_repo, "Removing corporate repo"),
-    (remove_ceph_repo, "Removing Ceph repo"),
-    (set_proxmox_repo_to_community, "Setting Proxmox repo to community"),
-    (update_and_upgrade_apt, "Updating and upgrading apt"),
-    (setup_venv_reqs_and_install_safe_pc, "Setting up venv, installing requirements, and installing SAFE PC via pip"),
-    (dl_opnsense_iso, "Checking for OPNsense ISO"),
-    (create_vm_data_pool_if_missing, "Creating VM data pool if missing"),
-    (create_opnsense_vm, "Checking for OPNsense VM"),
+    (
+        (set_production_env, "Setting production environment variable"),
+        (remove_enterprise_repo, "Removing corporate repo"),
+        (remove_ceph_repo, "Removing Ceph repo"),
+        (set_proxmox_repo_to_community, "Setting Proxmox repo to community"),
+    ),
+    # apt holds the dpkg lock, nothing else that may call apt can run alongside it
+    ((update_and_upgrade_apt, "Updating and upgrading apt"),),
+    (
+        (
+            setup_venv_reqs_and_install_safe_pc,
+            "Setting up venv, installing requirements, and installing SAFE PC via pip",
+        ),
+        (create_vm_data_pool_if_missing, "Creating VM data pool if missing"),
+    ),
+    # runs from the venv created above
+    ((dl_opnsense_iso, "Checking for OPNsense ISO"),),
+    ((create_opnsense_vm, "Checking for OPNsense VM"),),
 )
 
 
+async def _run_step(func: Callable[[], Any], description: str) -> None:
+    logger.debug(f"Starting step: {description}")
+    if asyncio.iscoroutinefunction(func):
+        await func()
+    else:
+        # sync steps do blocking file I/O, keep it off the event loop. They run in worker threads
+        # alongside the rest of their stage, so within a stage only one step may touch os.environ
+        # (set_production_env) and no two steps may write the same file.
+        await asyncio.to_thread(func)
+    logger.debug(f"Completed step: {description}")
+
+
 @only_on_proxmox
 async def main():
     setup_logging()  # ensures the logger is configured - poetry calls the main function directly
     logger.info("SAFE PC. Executing Proxmox Post Startup Script")
 
-    for step in post_startup_steps:
-        func, description = step
-        logger.debug(f"Starting step: {description}")
-        try:
-            await func() if asyncio.iscoroutinefunction(func) else func()
-            logger.debug(f"Completed step: {description}")
-        except Exception as e:
-            logger.error(f"Error during step '{description}': {e}")
+    for stage in post_startup_steps:
+        results = await asyncio.gather(
+            *(_run_step(func, description) for func, description in stage),
+            return_exceptions=True,
+        )
+
+        failed = False
+        for (_, description), result in zip(stage, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error during step '{description}': {result}")
+                failed = True
+
+        if failed:
             logger.info("Aborting post installation due to error.")
             exit(1)
 
@@ -1,5 +1,14 @@
-from utm.opnsense.downloader import download_and_verify_opnsense_iso
+# Exports are resolved lazily (PEP 562), see utm/utils/__init__.py
+from typing import TYPE_CHECKING
+from utm.utils._lazy import make_lazy
 
-__all__ = [
-    "download_and_verify_opnsense_iso",
-]
+if TYPE_CHECKING:
+    from utm.opnsense.downloader import download_and_verify_opnsense_iso
+
+_LAZY_EXPORTS: dict[str, str] = {
+    "download_and_verify_opnsense_iso": "utm.opnsense.downloader",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+__getattr__, __dir__ = make_lazy(__name__, _LAZY_EXPORTS)
@@ -3,7 +3,7 @@ from logging import getLogger
 from os import environ
 
 from utm.utils.console_driver import ConsoleDriver
-from utm.proxmox.vms import stop_vm, get_vm_status
+from utm.proxmox.vms import stop_vm, wait_for_vm_status
 from utm.__main__ import run_command_async, setup_logging
 from utm.opnsense.xml_template_sync import xml_template_sync
 from utm.opnsense.pexpect_drivers import drive_installer, drive_configurator  # type: ignore
@@ -28,14 +28,15 @@ async def _set_correct_boot_remove_iso(vm_id: str) -> None:
     await stop_vm(vm_id)
 
     logger.info(f"{base_prefix}Setting VM ID {vm_id} to boot from its hard disk.")
-    await run_command_async(*["qm", "set", vm_id, "--boot", "order=scsi0"], check=True)
-
     logger.info(f"{base_prefix}Removing installation ISO from VM ID {vm_id}.")
-    await run_command_async(*["qm", "set", vm_id, "--scsi1", "none"], check=True)
-
     # ensure the vm is set to boot when proxmox starts
     logger.info(f"{base_prefix}Enabling boot on startup for VM ID {vm_id}.")
-    await run_command_async(*["qm", "set", vm_id, "--onboot", "1"], check=True)
+
+    # qm set takes any number of options, apply them in one call instead of starting qm three times
+    await run_command_async(
+        *["qm", "set", vm_id, "--boot", "order=scsi0", "--scsi1", "none", "--onboot", "1"],
+        check=True,
+    )
 
     return None
 
@@ -59,14 +60,13 @@ async def post_install_interface_config(vm_id: str, root_password: str = DEFAULT
     try:
         async with ConsoleDriver(int(vm_id), logger, base_prefix) as console:
             # configure the machine here after it rebooted
-            while True:
-                try:
-                    status_cmd = await get_vm_status(vm_id)
-                    if "status: running" in status_cmd:
-                        break
-                    await sleep(2.5)
-                except Exception:
-                    await sleep(2.5)
+            try:
+                await wait_for_vm_status(vm_id, "running", timeout=logout_time_secs)
+            except TimeoutError:
+                logger.error(
+                    f"{base_prefix}VM ID {vm_id} did not reach 'running' within {logout_time_secs} seconds."
+                )
+                return False
             logger.info(f"{base_prefix}Starting post-install configuration for VM ID {vm_id}.")
             await drive_configurator(console.child, root_password)  # type: ignore
             return True
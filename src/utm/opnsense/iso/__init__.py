@@ -1,10 +1,19 @@
-from utm.opnsense.iso.downloader import OpnSenseISODownloader, OpnSenseDownloadError
-from utm.opnsense.iso.helpers import get_latest_opns_url_w_hash
-from utm.opnsense.iso.constants import OpnSenseConstants
-
-__all__ = [
-    "get_latest_opns_url_w_hash",
-    "OpnSenseISODownloader",
-    "OpnSenseDownloadError",
-    "OpnSenseConstants",
-]
+# Exports are resolved lazily (PEP 562), see utm/utils/__init__.py
+from typing import TYPE_CHECKING
+from utm.utils._lazy import make_lazy
+
+if TYPE_CHECKING:
+    from utm.opnsense.iso.downloader import OpnSenseISODownloader, OpnSenseDownloadError
+    from utm.opnsense.iso.helpers import get_latest_opns_url_w_hash
+    from utm.opnsense.iso.constants import OpnSenseConstants
+
+_LAZY_EXPORTS: dict[str, str] = {
+    "get_latest_opns_url_w_hash": "utm.opnsense.iso.helpers",
+    "OpnSenseISODownloader": "utm.opnsense.iso.downloader",
+    "OpnSenseDownloadError": "utm.opnsense.iso.downloader",
+    "OpnSenseConstants": "utm.opnsense.iso.constants",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+__getattr__, __dir__ = make_lazy(__name__, _LAZY_EXPORTS)
@@ -13,15 +13,24 @@ def get_opns_iso_dir() -> Path:
     else:
         base_dir = Path(__file__).resolve().parents[4] / "data" / "isos" / "opnsense"
 
-    if not base_dir.exists():
-        base_dir.mkdir(parents=True, exist_ok=True)
+    base_dir.mkdir(parents=True, exist_ok=True)
 
     return base_dir
 
 
+class _LazyIsoDir:
+    """Resolves (and creates) the ISO directory on first access rather than at import."""
+
+    def __get__(self, instance: object, owner: type) -> Path:
+        iso_dir = get_opns_iso_dir()
+        # replace the descriptor with the path, later lookups are a plain class attribute
+        setattr(owner, "ISO_DIR", iso_dir)
+        return iso_dir
+
+
 class OpnSenseConstants:
     CURRENT_VERSION = getenv("SAFE_PC_OPNSENSE_VERSION") or "25.7"
-    ISO_DIR = get_opns_iso_dir()
+    ISO_DIR = _LazyIsoDir()
     PUB_KEY_MIRROR = "https://pkg.opnsense.org/releases/mirror/README"  # not trusted, just for reference
     # NOSONAR TODO: ONLY support the latest 2 releases at any time (hardcoded this for now)
     RELEASES = {
@@ -1,10 +1,17 @@
+from asyncio import gather
 from pathlib import Path
 from base64 import b64decode
 from logging import getLogger
 from collections.abc import Callable, Awaitable
 
-from utm.__main__ import run_command_async
-from utm.utils import ISODownloader, fetch_text_from_url, remove_bz2_compression, OPNSENSE_ISO, IsoType
+from utm.utils import (
+    IsoType,
+    OPNSENSE_ISO,
+    ISODownloader,
+    fetch_text_from_url,
+    decompress_and_hash_bz2,
+    verify_sha256_signature,
+)
 
 LOGGER = getLogger(__name__)
 
@@ -38,14 +45,9 @@ class OpnSenseISODownloader(ISODownloader):
         self.downloaded_from: str = ""
         self.expected_sha256: str = ""
 
-        self.work_dir: Path = Path("/tmp/opnsense_iso_downloader")
         # self.downloaded_files: list[Path] = []
         self.verification_status: bool = False
 
-        # ensure the work dir exists
-        if not self.work_dir.exists():
-            self.work_dir.mkdir(parents=True, exist_ok=True)
-
     # Wrap the original callable to match parent type
     def _wrap_get_iso_info(
         self, original_get_iso_info: Callable[[], Awaitable[TChild]]
@@ -83,70 +85,41 @@ class OpnSenseISODownloader(ISODownloader):
         # Handle verification of the DL. If we make it this far the public key and sha matches our expected
         # HOWEVER, signatures have not been verified yet
         # get the signature file from the same location as the downloaded ISO
-        LOGGER.info(
-            f"Downloading OPNSense ISO signature file from: {self.downloaded_from.replace('.img.bz2', '.img.sig')}"
-        )
-        signature_file_text = await fetch_text_from_url(self.downloaded_from.replace(".img.bz2", ".img.sig"))
-        if not signature_file_text:
-            raise OpnSenseDownloadError("Failed to download OPNSense IMG signature file")
+        sig_url = self.downloaded_from.replace(".img.bz2", ".img.sig")
+        LOGGER.info(f"Downloading OPNSense ISO signature file from: {sig_url}")
 
         # decompress the iso before verifying the signature - OPNSense uses bz2 compression
         # And calculates the sha256 of the decompressed file
         if self.on_update:
             self.on_update(74, 100, "Decompressing OPNsense IMG.")
         LOGGER.info(f"Decompressing OPNSense IMG file: {self.dest_path}")
-        decompressed_path = await remove_bz2_compression(self.dest_path)
+
+        # fetch the signature while the image decompresses in a worker thread, the image is hashed as it's
+        # decompressed rather than read back for the signature check
+        signature_file_text, (decompressed_path, digest) = await gather(
+            fetch_text_from_url(sig_url), decompress_and_hash_bz2(self.dest_path)
+        )
+        if not signature_file_text:
+            raise OpnSenseDownloadError("Failed to download OPNSense IMG signature file")
 
         if not decompressed_path or not decompressed_path.exists():
             raise OpnSenseDownloadError("Failed to decompress OPNSense IMG file")
 
-        sig_path = self.work_dir / (decompressed_path.name + ".sig")
-        pub_key_path = self.work_dir / (decompressed_path.name + ".pub")
-
-        # decode and write the signature file
         sig_bytes = b64decode(signature_file_text)
-        sig_path.write_bytes(sig_bytes)
-
-        # write the public key file
-        pub_key_path.write_text(self.public_key)
-
-        # verify the signature using openssl
-        cmd_result = await run_command_async(
-            "openssl",
-            "dgst",
-            "-sha256",
-            "-verify",
-            str(pub_key_path),
-            "-signature",
-            str(sig_path),
-            str(decompressed_path),
-            check=False,
-        )
+
+        # verify in process, same check as `openssl dgst -sha256 -verify` without writing the signature and
+        # key to disk or spawning openssl
+        verified = verify_sha256_signature(self.public_key, sig_bytes, digest)
 
         if self.on_update:
             self.on_update(77, 100, "OPNSense ISO signature verification complete.")
 
-        if cmd_result.returncode != 0 or "Verified OK" not in cmd_result.stdout:  # type: ignore
-            LOGGER.error(f"Signature verification failed: {cmd_result.stderr}")  # type: ignore
-            LOGGER.error(f"Signature verification output: {cmd_result.stdout}")  # type: ignore
+        if not verified:
+            LOGGER.error(f"Signature verification failed for: {decompressed_path}")
             raise OpnSenseDownloadError("Failed to verify OPNSense ISO signature")
         self.verification_status = True
         LOGGER.info(f"OPNSense ISO signature verified successfully: {decompressed_path}")
         return self
 
-    async def __aexit__(
-        self,
-        exc_type: type[BaseException] | None,
-        exc: BaseException | None,
-        tb: object | None,
-    ) -> None:
-        # clean up the work dir
-        if self.work_dir.exists():
-            for item in self.work_dir.iterdir():
-                if item.is_file():
-                    item.unlink()
-            self.work_dir.rmdir()
-        await super().__aexit__(exc_type, exc, tb)
-
     def __await__(self, dl_if_exists: bool = False):
         return self.run(dl_if_exists).__await__()
@@ -1,7 +1,12 @@
 import re
 from pathlib import Path
+from httpx import AsyncClient
 from logging import getLogger
-from asyncio import gather as asyncio_gather
+from contextlib import nullcontext
+from typing import Any
+from functools import lru_cache
+from collections.abc import Awaitable
+from asyncio import Lock, Semaphore, as_completed, create_task
 from secrets import choice as random_choice_secure
 from utm.opnsense.iso.constants import OpnSenseConstants
 from utm.__main__ import is_testing, is_production
@@ -14,11 +19,22 @@ from utm.utils import (
 
 
 LOGGER = getLogger(__name__)
+MAX_CONCURRENT_FETCHES = 4
+# agreed on key and hash per OPNsense version, the published values don't change while we run
+_authoritative_cache: dict[str, tuple[str, str]] = {}
+_authoritative_lock = Lock()
+VERSION_HASH_PATTERN = re.compile(OpnSenseConstants.VERSION_HASH)
+BR_TAG_PATTERN = re.compile(r"<br\s*/?>")
+COMMENT_LINE_PATTERN = re.compile(r"\n\s*#")
 
 
+@lru_cache(maxsize=1)
 def get_closest_mirror() -> str:
     """Get the closest mirror for downloading OPNSense ISOs.
 
+    The timezone and configured version don't change while we run, so the choice is made once
+    per process, a tie is broken the same way on every call.
+
     Returns:
         str: The URL of the closest mirror.
     """
@@ -56,25 +72,34 @@ def extract_public_key_from_text(text: str) -> str:
     END = "-----END PUBLIC KEY-----"
 
     start_index = text.find(START)
-    end_index = text.find(END, start_index) + len(END)
+    if start_index == -1:
+        raise ValueError("Public key not found in the provided text.")
 
-    if start_index == -1 or end_index == -1:
+    # only search past the BEGIN marker, a missing END must be caught before len(END) is added
+    end_index = text.find(END, start_index + len(START))
+    if end_index == -1:
         raise ValueError("Public key not found in the provided text.")
 
-    return text[start_index:end_index]
+    return text[start_index : end_index + len(END)]
 
 
 def extract_sha256_from_text(text: str, version: str) -> str:
     """Extracts the SHA256 hash for the specified version from the given text."""
-    match = re.search(OpnSenseConstants.VERSION_HASH, text)
+    match = VERSION_HASH_PATTERN.search(text)
     if not match:
         raise ValueError(f"SHA256 hash for version {version} not found in the provided text.")
     return match.group(1)
 
 
-async def extract_pub_key_from_mirror(mirror: str = OpnSenseConstants.PUB_KEY_MIRROR) -> str:
+async def extract_pub_key_from_mirror(
+    mirror: str = OpnSenseConstants.PUB_KEY_MIRROR, client: AsyncClient | None = None
+) -> str:
     """Fetches the public key from the OPNSense mirror.
 
+    Args:
+        mirror (str): The URL of the mirror's public key.
+        client (AsyncClient | None): A client to reuse for the request. Defaults to None.
+
     Returns:
         str: The public key as a string. Empty string on failure.
 
@@ -82,7 +107,7 @@ async def extract_pub_key_from_mirror(mirror: str = OpnSenseConstants.PUB_KEY_MI
         The mirror only lists the public key, not the SHA256 hashes.
     """
     try:
-        txt = await fetch_text_from_url(mirror)
+        txt = await fetch_text_from_url(mirror, client=client)
         pub_key = extract_public_key_from_text(txt)
         return pub_key
     except Exception as e:
@@ -90,22 +115,23 @@ async def extract_pub_key_from_mirror(mirror: str = OpnSenseConstants.PUB_KEY_MI
         return ""
 
 
-async def get_pub_key_and_hash(url: str, version: str) -> tuple[str, str]:
+async def get_pub_key_and_hash(url: str, version: str, client: AsyncClient | None = None) -> tuple[str, str]:
     """Get the public key and SHA256 hash for a given OPNSense version.
 
     Args:
         url (str): The URL of the page containing the public key and SHA256 hash.
+        client (AsyncClient | None): A client to reuse for the request. Defaults to None.
     Returns:
         tuple[str, str]: A tuple containing the public key and SHA256 hash. Empty strings on failure.
     """
     try:
 
-        txt = await fetch_text_from_url(url)
+        txt = await fetch_text_from_url(url, client=client)
         pub_key = extract_public_key_from_text(txt)
         # replace ALL <brs> with newlines to ensure proper formatting
-        pub_key = re.sub(r"<br\s*/?>", "\n", pub_key)
+        pub_key = BR_TAG_PATTERN.sub("\n", pub_key)
         # replace any \n# or \n # with just \n to clean up any comment lines
-        pub_key = re.sub(r"\n\s*#", "\n", pub_key)
+        pub_key = COMMENT_LINE_PATTERN.sub("\n", pub_key)
         sha256_hash = extract_sha256_from_text(txt, version)
         return pub_key, sha256_hash
     except Exception as e:
@@ -113,41 +139,94 @@ async def get_pub_key_and_hash(url: str, version: str) -> tuple[str, str]:
         return "", ""
 
 
-async def get_educated_authoritative_key_and_hash() -> tuple[str, str]:
+async def get_educated_authoritative_key_and_hash(client: AsyncClient | None = None) -> tuple[str, str]:
     """
     Determine the most trustworthy OPNsense public key and SHA256 hash
     by cross-checking multiple sources. Requires majority (n-1, min 2) agreement.
 
+    Args:
+        client (AsyncClient | None): A client to reuse for every request. Defaults to a new
+            client shared by this call's requests.
+
     Returns:
         Tuple[str, str]: (public_key, sha256_hash)
         The SHA256 may be empty if consensus wasn't reached.
+
+    Note:
+        A reached consensus is cached per version for the life of the process, a failed one is retried.
     """
-    discovered_keys: list[str] = []
-    discovered_hashes: list[str] = []
+    version = OpnSenseConstants.CURRENT_VERSION
+    # concurrent callers wait for the first lookup rather than repeating it
+    async with _authoritative_lock:
+        if cached := _authoritative_cache.get(version):
+            return cached
 
-    # 1. Mirror (baseline)
-    mirror_key: str = await extract_pub_key_from_mirror() or ""
-    if mirror_key:
-        discovered_keys.append(mirror_key)
-    else:
-        LOGGER.warning("Failed to fetch public key from mirror.")
+        async with nullcontext(client) if client is not None else AsyncClient() as client:
+            key, sha256 = await _get_educated_authoritative_key_and_hash(client)
+
+        if key and sha256:
+            _authoritative_cache[version] = (key, sha256)
+        return key, sha256
 
-    # 2. Other release URLs concurrently
+
+def _consensus_is_settled(values: list[str], total_sources: int) -> bool:
+    """Check if the values seen so far already decide `reach_consensus` however the remaining sources answer."""
+    counts: dict[str, int] = {}
+    for v in values:
+        if v and v.strip():
+            counts[v] = counts.get(v, 0) + 1
+    # n-1 (min 2) of every source agreeing can't be outvoted, missing answers only lower the bar
+    return max(counts.values(), default=0) >= max(2, total_sources - 1)
+
+
+async def _get_educated_authoritative_key_and_hash(client: AsyncClient) -> tuple[str, str]:
+    discovered_keys: list[str] = []
+    discovered_hashes: list[str] = []
     release_urls: list[str] = OpnSenseConstants.RELEASES[OpnSenseConstants.CURRENT_VERSION][0]
+    semaphore = Semaphore(MAX_CONCURRENT_FETCHES)
 
-    results: list[tuple[str, str] | BaseException] = await asyncio_gather(
-        *[get_pub_key_and_hash(url, OpnSenseConstants.CURRENT_VERSION) for url in release_urls],
-        return_exceptions=True,
-    )
+    async def bounded(fetch: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await fetch
 
-    for res in results:
-        if isinstance(res, Exception):
-            continue
-        pub_key, sha256_hash = res  # type: ignore
-        if pub_key:
-            discovered_keys.append(pub_key)  # type: ignore
-        if sha256_hash:
-            discovered_hashes.append(sha256_hash)  # type: ignore
+    # 1. Mirror (baseline) and 2. the other release URLs, all concurrently
+    mirror_task = create_task(bounded(extract_pub_key_from_mirror(client=client)))
+    release_tasks = [
+        create_task(bounded(get_pub_key_and_hash(url, OpnSenseConstants.CURRENT_VERSION, client)))
+        for url in release_urls
+    ]
+
+    try:
+        # stop waiting on slow sources once the answer can no longer change
+        for next_done in as_completed([mirror_task, *release_tasks]):
+            try:
+                res = await next_done
+            except Exception:
+                continue
+            if isinstance(res, str):
+                if res:
+                    discovered_keys.append(res)
+            else:
+                pub_key, sha256_hash = res
+                if pub_key:
+                    discovered_keys.append(pub_key)
+                if sha256_hash:
+                    discovered_hashes.append(sha256_hash)
+
+            if _consensus_is_settled(discovered_keys, len(release_tasks) + 1) and _consensus_is_settled(
+                discovered_hashes, len(release_tasks)
+            ):
+                break
+    finally:
+        for task in (mirror_task, *release_tasks):
+            task.cancel()
+
+    # the mirror key is only the fallback below, it may have been cancelled once consensus was settled
+    mirror_key: str = ""
+    if mirror_task.done() and not mirror_task.cancelled():
+        mirror_key = mirror_task.result() or ""
+        if not mirror_key:
+            LOGGER.warning("Failed to fetch public key from mirror.")
 
     # 3. Reach consensus
     key: str = reach_consensus(discovered_keys)
@@ -166,48 +245,50 @@ async def get_educated_authoritative_key_and_hash() -> tuple[str, str]:
 async def get_latest_opns_url_w_hash() -> tuple[str, str, str]:
 
     try:
-        # Try to get a hash and public key
-        key, sha256 = await get_educated_authoritative_key_and_hash()
-
-        if not key and not sha256 or not validate_sha256(sha256):
-            err_msg = "Failed to obtain authoritative public key and SHA256 hash."
-            LOGGER.error(err_msg)
-            raise ValueError(err_msg)
-
-        url = get_closest_mirror()
-
-        # from the mirror, we need to first check its list of hashes
-        # if these are different or do not exist, we should not proceed
-        sums_url = f"{url}/OPNsense-{OpnSenseConstants.CURRENT_VERSION}-checksums-amd64.sha256"
-
-        # grab the public key from the mirror too, just to be sure
-        mirror_listed_key = await extract_pub_key_from_mirror(
-            f"{url}/OPNsense-{OpnSenseConstants.CURRENT_VERSION}.pub"
-        )
-
-        if not mirror_listed_key or mirror_listed_key != key:
-            err_msg = "Public key from mirror does not match authoritative key. Not proceeding."
-            LOGGER.error(err_msg)
-            raise ValueError(err_msg)
-
-        # verify the hash from the mirror matches the 'authoritative' hash (Note: this does NOT verify the ISO itself)
-        mirror_listed_hash = extract_sha256_from_text(
-            await fetch_text_from_url(sums_url), OpnSenseConstants.CURRENT_VERSION
-        )
-
-        if (
-            not mirror_listed_hash
-            or not validate_sha256(mirror_listed_hash)
-            or (mirror_listed_hash.lower() != sha256.lower())
-        ):
-            err_msg = "Hash from mirror does not match authoritative hash. Not proceeding."
-
-            LOGGER.error(err_msg)
-            raise ValueError(err_msg)
-
-        iso_url = f"{url}/OPNsense-{OpnSenseConstants.CURRENT_VERSION}-serial-amd64.img.bz2"
-
-        return iso_url, sha256, key
+        # one client for every request below, requests to the same host reuse its connections
+        async with AsyncClient() as client:
+            # Try to get a hash and public key
+            key, sha256 = await get_educated_authoritative_key_and_hash(client)
+
+            if not key and not sha256 or not validate_sha256(sha256):
+                err_msg = "Failed to obtain authoritative public key and SHA256 hash."
+                LOGGER.error(err_msg)
+                raise ValueError(err_msg)
+
+            url = get_closest_mirror()
+
+            # from the mirror, we need to first check its list of hashes
+            # if these are different or do not exist, we should not proceed
+            sums_url = f"{url}/OPNsense-{OpnSenseConstants.CURRENT_VERSION}-checksums-amd64.sha256"
+
+            # grab the public key from the mirror too, just to be sure
+            mirror_listed_key = await extract_pub_key_from_mirror(
+                f"{url}/OPNsense-{OpnSenseConstants.CURRENT_VERSION}.pub", client
+            )
+
+            if not mirror_listed_key or mirror_listed_key != key:
+                err_msg = "Public key from mirror does not match authoritative key. Not proceeding."
+                LOGGER.error(err_msg)
+                raise ValueError(err_msg)
+
+            # verify the hash from the mirror matches the 'authoritative' hash (Note: this does NOT verify the ISO itself)
+            mirror_listed_hash = extract_sha256_from_text(
+                await fetch_text_from_url(sums_url, client=client), OpnSenseConstants.CURRENT_VERSION
+            )
+
+            if (
+                not mirror_listed_hash
+                or not validate_sha256(mirror_listed_hash)
+                or (mirror_listed_hash.lower() != sha256.lower())
+            ):
+                err_msg = "Hash from mirror does not match authoritative hash. Not proceeding."
+
+                LOGGER.error(err_msg)
+                raise ValueError(err_msg)
+
+            iso_url = f"{url}/OPNsense-{OpnSenseConstants.CURRENT_VERSION}-serial-amd64.img.bz2"
+
+            return iso_url, sha256, key
     except Exception as e:
         LOGGER.error(f"Error determining authoritative key/hash: {e}")
         return "", "", ""
@@ -230,6 +311,5 @@ def get_iso_folder_path(iso_name: str) -> Path:
 
     if is_testing():
         iso_path = Path(__file__).resolve().parents[3] / "tests" / "data" / "isos" / iso_name
-    if not iso_path.parent.exists():
-        iso_path.parent.mkdir(parents=True, exist_ok=True)
+    iso_path.parent.mkdir(parents=True, exist_ok=True)
     return iso_path
@@ -1,19 +1,57 @@
 # type: ignore
 from asyncio import sleep
-from utm.utils.utils import send_key_to_pexpect_proc, strip_ansi_escape_sequences  # type: ignore
+from re import compile as re_compile
+from utm.utils.utils import (  # type: ignore
+    send_key_to_pexpect_proc,
+    strip_ansi_escape_sequences,
+    split_incomplete_ansi_escape,
+)
 
 from pexpect import spawn as pe_spawn, TIMEOUT, EOF  # type: ignore
 
+# every string the prompt checks below look for, a prompt can only newly appear if one of these shows up
+INSTALLER_PROMPT_PATTERN = re_compile(
+    r"Welcome to the OPNSense installer|login:|Choose one of the following tasks|stripe  Stripe - No Redundancy"
+    r"|Keymap Selection|Please select one or more disks to create a zpool|Password:|Last Chance!|Root Password"
+    r"|Change root password|The installation finished successfully"
+)
+# longest prompt string, used to catch a prompt split across two reads
+PROMPT_OVERLAP = len("Please select one or more disks to create a zpool") - 1
+# a full installer screen fits well within this, older output between prompts is dropped
+MAX_BUFFER_SIZE = 16 * 1024
+BUFFER_KEEP_SIZE = 8 * 1024
+
 
 async def drive_installer(child: pe_spawn, root_password: str = "UseBetterPassword!23") -> None:  # NOSONAR
     buffer = ""
+    pending = ""
     pwd_confirmed = False
     while True:
         try:
-            # Output is inconsistent, read it in chunks in a non-blocking manner
-            chunk = child.read_nonblocking(size=2048, timeout=2)  # type: ignore
-            buffer += chunk  # type: ignore
-            screen_buffer = strip_ansi_escape_sequences(buffer)  # type: ignore
+            try:
+                # Output is inconsistent, read it in chunks in a non-blocking manner
+                chunk = child.read_nonblocking(size=2048, timeout=2)  # type: ignore
+                # strip only the new output rather than the whole buffer on every read, holding back
+                # an escape sequence that was cut off until the rest of it arrives
+                text, pending = split_incomplete_ansi_escape(pending + chunk)  # type: ignore
+            except TIMEOUT:
+                # the output went quiet, so whatever was held back is not getting completed
+                if not pending:
+                    continue
+                text, pending = pending, ""
+            new_text = strip_ansi_escape_sequences(text)
+            buffer += new_text
+            if len(buffer) > MAX_BUFFER_SIZE:
+                buffer = buffer[-BUFFER_KEEP_SIZE:]
+            screen_buffer = buffer
+
+            # the older part of the buffer was already checked on an earlier read. Text that matched no branch,
+            # i.e. "Root Password" before "Change root password" arrives, stays in the buffer (until the size
+            # cap drops it) and only the new text can complete a branch's condition, so skip the checks below
+            # unless it (plus an overlap for a string split across reads) holds one of the prompt strings
+            tail_start = max(0, len(screen_buffer) - len(new_text) - PROMPT_OVERLAP)
+            if not new_text or not INSTALLER_PROMPT_PATTERN.search(screen_buffer, tail_start):
+                continue
 
             if "Welcome to the OPNSense installer" in screen_buffer:
                 send_key_to_pexpect_proc("enter", child)
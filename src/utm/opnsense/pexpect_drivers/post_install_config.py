@@ -1,5 +1,5 @@
 from os import environ
-from re import search
+from re import compile as re_compile
 from asyncio import sleep
 from logging import getLogger
 from utm.utils.utils import strip_ansi_escape_sequences  # type: ignore
@@ -9,6 +9,8 @@ from pexpect import spawn as pe_spawn, TIMEOUT, EOF  # type: ignore
 
 logger = getLogger("utm.opnsense.post_install_config")
 base_prefix = "[OPNSense Post-Install Configurator] "
+WAN_NUMBER_PATTERN = re_compile(r"(\d+) - WAN")
+LAN_NUMBER_PATTERN = re_compile(r"(\d+) - LAN")
 
 # This is DIRTY but it works - took longer than it should to get dyanmic WAN, REFACTOR AT OWN RISK!
 # This configurator does not assume that the WAN or LAN are on a specific interface
@@ -52,7 +54,7 @@ async def drive_configurator(child: pe_spawn, root_password: str = "UseBetterPas
                 buffer = ""
             elif "Available interfaces:" in screen_buffer and not wan_configured and not lan_configured:
                 # Assign WAN via DHCP
-                wan_number = search(r"(\d+) - WAN", screen_buffer)
+                wan_number = WAN_NUMBER_PATTERN.search(screen_buffer)
                 if wan_number:
                     child.send(f"{wan_number.group(1)}\r")
                     await sleep(1)
@@ -125,7 +127,7 @@ async def drive_configurator(child: pe_spawn, root_password: str = "UseBetterPas
 
             elif "Available interfaces:" in screen_buffer and wan_configured and not lan_configured:
                 # Assign LAN to 10.3.8.1/24
-                lan_number = search(r"(\d+) - LAN", screen_buffer)
+                lan_number = LAN_NUMBER_PATTERN.search(screen_buffer)
                 if lan_number:
                     child.send(f"{lan_number.group(1)}\r")
                     await sleep(1)
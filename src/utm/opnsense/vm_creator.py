@@ -254,23 +254,25 @@ async def create_new_opnsense_vm(
     # Attach first PCI NICs
     if not await is_host_vm():
         filtered = filter_pci_nics(pci_nics)
-        for idx, pci_id in enumerate(filtered):
-            # Drop the .function part to pass through all functions (e.g., 0000:01:00)
-            pci_base = pci_id.rsplit(".", 1)[0]
-            pci_opts = f"{pci_base},pcie=1"
+        # Drop the .function part to pass through all functions (e.g., 0000:01:00)
+        # qm set takes any number of options, attach every NIC in one call
+        hostpci_opts = [
+            f"--hostpci{idx}={pci_id.rsplit('.', 1)[0]},pcie=1" for idx, pci_id in enumerate(filtered)
+        ]
 
+        if hostpci_opts:
             result: CmdResult = await run_command_async(
                 *[
                     "qm",
                     "set",
                     str(vm_id),
-                    f"--hostpci{idx}={pci_opts}",
+                    *hostpci_opts,
                 ],
                 check=False,
             )
 
             if result.returncode != 0:
-                logger.error(f"Failed to attach PCI NIC {pci_id}: {result.stderr}")
+                logger.error(f"Failed to attach PCI NICs {', '.join(filtered)}: {result.stderr}")
                 return False
     else:
         # attach the nics as virtio rather than passthrough
@@ -285,6 +287,7 @@ async def create_new_opnsense_vm(
                 "-lc",
                 f"grep -q -E '^(auto|iface)\\s+{bridge_name}\\b' /etc/network/interfaces",
                 check=False,
+                capture="none",
             )
             if exists.returncode != 0:
                 await run_command_async(
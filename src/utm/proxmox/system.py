@@ -115,7 +115,7 @@ async def blacklist_host_driver_for_pci_id(pci_id: str) -> bool:
         "-c",
         f"grep -q '^blacklist {driver}$' {blacklist_file} 2>/dev/null",
     ]
-    check_result = await run_command_async(*cmd_check, check=False)
+    check_result = await run_command_async(*cmd_check, check=False, capture="none")
     if check_result.returncode == 0:
         LOGGER.info(f"Driver {driver} already blacklisted ({blacklist_file})")
         return True
@@ -1,13 +1,19 @@
 from os import path
 from logging import getLogger
+from asyncio import sleep, wait_for
 from utm.__main__ import run_command_async, CmdResult
 
 logger = getLogger("utm.proxmox.vms")
 
+STATUS_POLL_INITIAL_DELAY = 0.25  # seconds
+STATUS_POLL_MAX_DELAY = 2.0  # seconds
+STATUS_POLL_BACKOFF = 1.6
+
 
 async def get_vm_status(vm_id: str) -> str:
     """Get the current status of a Proxmox VM."""
-    result: CmdResult = await run_command_async("qm", "status", vm_id)
+    # polled in wait loops, skip closing inherited fds on every spawn
+    result: CmdResult = await run_command_async("qm", "status", vm_id, close_fds=False)
     return result.stdout.strip()
 
 
@@ -56,3 +62,33 @@ async def vm_start_if_not_running(vm_id: str) -> None:
     if "status: running" not in status:
         logger.info(f"Starting VM ID {vm_id}. Current status: {status}")
         await start_vm(vm_id)
+
+
+async def wait_for_vm_status(vm_id: str, status: str = "running", timeout: float | None = None) -> None:
+    """Wait until a Proxmox VM reports the given status.
+
+    Polls `qm status` with exponential backoff, starting at 250 ms and capped at 2 s, so a VM
+    that is ready quickly is noticed quickly without spawning qm in a tight loop.
+
+    Args:
+        vm_id (str): The Proxmox VM ID.
+        status (str): The status to wait for, i.e. "running" or "stopped".
+        timeout (float | None): Give up after this many seconds. Defaults to waiting forever.
+
+    Raises:
+        TimeoutError: If the VM doesn't reach the status within `timeout`.
+    """
+    expected = f"status: {status}"
+
+    async def _poll() -> None:
+        delay = STATUS_POLL_INITIAL_DELAY
+        while True:
+            try:
+                if expected in await get_vm_status(vm_id):
+                    return
+            except Exception as e:
+                logger.debug(f"Failed to get status for VM ID {vm_id}, retrying: {e}")
+            await sleep(delay)
+            delay = min(delay * STATUS_POLL_BACKOFF, STATUS_POLL_MAX_DELAY)
+
+    await wait_for(_poll(), timeout=timeout)
@@ -1,56 +1,71 @@
-from utm.utils.crypto import (
-    TempKeyFile,
-    compute_sha256,
-    compute_sha512,
-    verify_sha256,
-    verify_sha512,
-    validate_sha256,
-    validate_sha512,
-    password_entropy,
-    SAFE_PC_CERT_DEFAULTS,
-    is_high_entropy_password,
-    generate_self_signed_cert,
-)
-from utm.utils.time import get_current_tz_utc_off_hrs
-from utm.utils.utils import (
-    get_local_ip,
-    fetch_text_from_url,
-    calculate_percentage,
-    remove_bz2_compression,
-    handle_keyboard_interrupt,
-)
-from utm.utils.quorum import reach_consensus
-from utm.utils.iso_dl import (
-    IsoType,
-    PROXMOX_ISO,
-    OPNSENSE_ISO,
-    ISODownloader,
-    need_to_download,
-)
+# Exports are resolved lazily (PEP 562) so importing a single helper, i.e.
+# handle_keyboard_interrupt, doesn't pull in cryptography, httpx, tqdm, etc.
+from typing import TYPE_CHECKING
+from utm.utils._lazy import make_lazy
 
+if TYPE_CHECKING:
+    from utm.utils.crypto import (
+        TempKeyFile,
+        compute_hashes,
+        compute_sha256,
+        compute_sha512,
+        verify_sha256,
+        verify_sha512,
+        verify_sha256_signature,
+        validate_sha256,
+        validate_sha512,
+        password_entropy,
+        SAFE_PC_CERT_DEFAULTS,
+        is_high_entropy_password,
+        generate_self_signed_cert,
+    )
+    from utm.utils.time import get_current_tz_utc_off_hrs
+    from utm.utils.utils import (
+        get_local_ip,
+        fetch_text_from_url,
+        calculate_percentage,
+        remove_bz2_compression,
+        decompress_and_hash_bz2,
+        handle_keyboard_interrupt,
+    )
+    from utm.utils.quorum import reach_consensus
+    from utm.utils.iso_dl import (
+        IsoType,
+        PROXMOX_ISO,
+        OPNSENSE_ISO,
+        ISODownloader,
+        need_to_download,
+    )
 
-__all__ = [
-    "IsoType",
-    "PROXMOX_ISO",
-    "OPNSENSE_ISO",
-    "get_local_ip",
-    "TempKeyFile",
-    "verify_sha256",
-    "verify_sha512",
-    "reach_consensus",
-    "compute_sha256",
-    "compute_sha512",
-    "ISODownloader",
-    "validate_sha256",
-    "validate_sha512",
-    "need_to_download",
-    "password_entropy",
-    "fetch_text_from_url",
-    "calculate_percentage",
-    "SAFE_PC_CERT_DEFAULTS",
-    "remove_bz2_compression",
-    "is_high_entropy_password",
-    "generate_self_signed_cert",
-    "handle_keyboard_interrupt",
-    "get_current_tz_utc_off_hrs",
-]
+_LAZY_EXPORTS: dict[str, str] = {
+    "IsoType": "utm.utils.iso_dl",
+    "PROXMOX_ISO": "utm.utils.iso_dl",
+    "OPNSENSE_ISO": "utm.utils.iso_dl",
+    "get_local_ip": "utm.utils.utils",
+    "TempKeyFile": "utm.utils.crypto.temp_key_file",
+    "verify_sha256": "utm.utils.crypto.crypto",
+    "verify_sha512": "utm.utils.crypto.crypto",
+    "verify_sha256_signature": "utm.utils.crypto.crypto",
+    "reach_consensus": "utm.utils.quorum",
+    "compute_hashes": "utm.utils.crypto.crypto",
+    "compute_sha256": "utm.utils.crypto.crypto",
+    "compute_sha512": "utm.utils.crypto.crypto",
+    "ISODownloader": "utm.utils.iso_dl",
+    "validate_sha256": "utm.utils.crypto.crypto",
+    "validate_sha512": "utm.utils.crypto.crypto",
+    "need_to_download": "utm.utils.iso_dl",
+    "password_entropy": "utm.utils.crypto.entropy",
+    "fetch_text_from_url": "utm.utils.utils",
+    "calculate_percentage": "utm.utils.utils",
+    "SAFE_PC_CERT_DEFAULTS": "utm.utils.crypto.X509",
+    "remove_bz2_compression": "utm.utils.utils",
+    "decompress_and_hash_bz2": "utm.utils.utils",
+    "is_high_entropy_password": "utm.utils.crypto.entropy",
+    "generate_self_signed_cert": "utm.utils.crypto.X509",
+    "handle_keyboard_interrupt": "utm.utils.utils",
+    "get_current_tz_utc_off_hrs": "utm.utils.time",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+__getattr__, __dir__ = make_lazy(__name__, _LAZY_EXPORTS)
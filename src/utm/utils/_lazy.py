@@ -0,0 +1,33 @@
+"""
+Description: Shared PEP 562 lazy exports for package `__init__` modules.
+"""
+
+from sys import modules
+from importlib import import_module
+from collections.abc import Callable, Mapping
+
+
+def make_lazy(module_name: str, exports: Mapping[str, str]) -> tuple[Callable[[str], object], Callable[[], list[str]]]:
+    """Build a module level `__getattr__` and `__dir__` that import exported names on first access.
+
+    Args:
+        module_name: The package's `__name__`.
+        exports: Each exported name mapped to the module that defines it.
+
+    Returns:
+        The `(__getattr__, __dir__)` pair to assign in the package.
+    """
+
+    def __getattr__(name: str) -> object:
+        try:
+            module = exports[name]
+        except KeyError:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}") from None
+        value = getattr(import_module(module), name)
+        setattr(modules[module_name], name, value)  # cache so later lookups skip __getattr__
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(modules[module_name])) | set(exports))
+
+    return __getattr__, __dir__
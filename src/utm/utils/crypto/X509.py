@@ -1,11 +1,8 @@
+from os import scandir
 from typing import Any
 from pathlib import Path
-from cryptography import x509
 from argparse import ArgumentParser
-from cryptography.x509.oid import NameOID
 from datetime import datetime, timedelta, timezone
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import hashes, serialization
 from utm.utils.utils import get_local_ip
 
 
@@ -44,6 +41,11 @@ def generate_self_signed_cert(**kwargs: Any) -> tuple[Path, Path]:
     Output:
         Writes {cert_dir}/{name_prefix}key.pem and {cert_dir}/{name_prefix}cert.pem
     """
+    # imported here, cryptography is slow to import and only needed when generating a cert
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives import hashes, serialization
 
     params: dict[str, Any] = {**SAFE_PC_CERT_DEFAULTS, **kwargs}
 
@@ -79,30 +81,38 @@ def generate_self_signed_cert(**kwargs: Any) -> tuple[Path, Path]:
         alt_names = [common_name]
     san = x509.SubjectAlternativeName([x509.DNSName(name) for name in alt_names])
 
+    now = datetime.now(timezone.utc)
     cert = (
         x509.CertificateBuilder()
         .subject_name(subject)
         .issuer_name(issuer)
         .public_key(private_key.public_key())
         .serial_number(x509.random_serial_number())
-        .not_valid_before(datetime.now(timezone.utc))
-        .not_valid_after(datetime.now(timezone.utc) + timedelta(days=days_valid))
+        .not_valid_before(now)
+        .not_valid_after(now + timedelta(days=days_valid))
         .add_extension(san, critical=False)
         .sign(private_key, hashes.SHA256())
     )
 
-    key_path = cert_dir / f"{name_prefix}key.pem"
-    cert_path = cert_dir / f"{name_prefix}cert.pem"
+    key_name = f"{name_prefix}key.pem"
+    cert_name = f"{name_prefix}cert.pem"
 
-    if not gen_if_exists and key_path.exists() and cert_path.exists():
-        return key_path, cert_path
+    # read the directory once rather than stat-ing every candidate name
+    with scandir(cert_dir) as entries:
+        existing = {entry.name for entry in entries}
+
+    if not gen_if_exists and key_name in existing and cert_name in existing:
+        return cert_dir / key_name, cert_dir / cert_name
 
     count = 1
-    while key_path.exists() or cert_path.exists():
-        key_path = cert_dir / f"{name_prefix}key({count}).pem"
-        cert_path = cert_dir / f"{name_prefix}cert({count}).pem"
+    while key_name in existing or cert_name in existing:
+        key_name = f"{name_prefix}key({count}).pem"
+        cert_name = f"{name_prefix}cert({count}).pem"
         count += 1
 
+    key_path = cert_dir / key_name
+    cert_path = cert_dir / cert_name
+
     key_path.write_bytes(
         private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
@@ -1,30 +1,41 @@
-from utm.utils.crypto.crypto import (
-    compute_sha256,
-    compute_sha512,
-    verify_sha256,
-    verify_sha512,
-    validate_sha256,
-    validate_sha512,
-)
+# Exports are resolved lazily (PEP 562), see utm/utils/__init__.py
+from typing import TYPE_CHECKING
+from utm.utils._lazy import make_lazy
 
+if TYPE_CHECKING:
+    from utm.utils.crypto.crypto import (
+        compute_hashes,
+        compute_sha256,
+        compute_sha512,
+        verify_sha256,
+        verify_sha512,
+        verify_sha256_signature,
+        validate_sha256,
+        validate_sha512,
+    )
+    from utm.utils.crypto.X509 import (
+        SAFE_PC_CERT_DEFAULTS,
+        generate_self_signed_cert,
+    )
+    from utm.utils.crypto.temp_key_file import TempKeyFile
+    from utm.utils.crypto.entropy import password_entropy, is_high_entropy_password
 
-from utm.utils.crypto.X509 import (
-    SAFE_PC_CERT_DEFAULTS,
-    generate_self_signed_cert,
-)
-from utm.utils.crypto.temp_key_file import TempKeyFile
-from utm.utils.crypto.entropy import password_entropy, is_high_entropy_password
+_LAZY_EXPORTS: dict[str, str] = {
+    "TempKeyFile": "utm.utils.crypto.temp_key_file",
+    "compute_hashes": "utm.utils.crypto.crypto",
+    "compute_sha256": "utm.utils.crypto.crypto",
+    "compute_sha512": "utm.utils.crypto.crypto",
+    "verify_sha256": "utm.utils.crypto.crypto",
+    "verify_sha512": "utm.utils.crypto.crypto",
+    "verify_sha256_signature": "utm.utils.crypto.crypto",
+    "validate_sha256": "utm.utils.crypto.crypto",
+    "validate_sha512": "utm.utils.crypto.crypto",
+    "password_entropy": "utm.utils.crypto.entropy",
+    "SAFE_PC_CERT_DEFAULTS": "utm.utils.crypto.X509",
+    "is_high_entropy_password": "utm.utils.crypto.entropy",
+    "generate_self_signed_cert": "utm.utils.crypto.X509",
+}
 
-__all__ = [
-    "TempKeyFile",
-    "compute_sha256",
-    "compute_sha512",
-    "verify_sha256",
-    "verify_sha512",
-    "validate_sha256",
-    "validate_sha512",
-    "password_entropy",
-    "SAFE_PC_CERT_DEFAULTS",
-    "is_high_entropy_password",   
-    "generate_self_signed_cert",
-]
\ No newline at end of file
+__all__ = list(_LAZY_EXPORTS)
+
+__getattr__, __dir__ = make_lazy(__name__, _LAZY_EXPORTS)
@@ -3,17 +3,118 @@ Description: This module provides reusable async cryptographic utilities.
 """
 
 import asyncio, base64, hashlib
-from re import match
+from hmac import compare_digest
 from pathlib import Path
+from os import fstat
 from logging import getLogger
-from hashlib import sha256, sha512
+from collections.abc import Sequence
+from mmap import mmap, ACCESS_READ
 from utm.__main__ import is_verbose
-from aiofiles import open as aiofiles_open
 
-CHUNK_SIZE = 8192
+try:
+    from mmap import MADV_SEQUENTIAL
+except ImportError:  # madvise is POSIX only
+    MADV_SEQUENTIAL = None
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB reads for files that aren't memory-mapped
+MMAP_THRESHOLD = 64 * 1024  # 64 KiB, smaller files are cheaper to read directly
+MMAP_SLICE_SIZE = 1024 * 1024  # 1 MiB
+_HEX_CHARS = frozenset("0123456789abcdefABCDEF")
 LOGGER = getLogger(__name__)
 
 
+def _is_openssl_backed(algorithm: str) -> bool:
+    """Check if hashlib resolves `algorithm` to OpenSSL's EVP implementation.
+
+    OpenSSL dispatches to SHA-NI/ARMv8 SHA instructions when the CPU supports them,
+    the builtin fallback (`_sha2`) does not.
+    """
+    return type(hashlib.new(algorithm)).__module__ == "_hashlib"
+
+
+if not all(_is_openssl_backed(alg) for alg in ("sha256", "sha512")):
+    from ssl import OPENSSL_VERSION
+
+    LOGGER.warning(
+        f"hashlib is not using OpenSSL for SHA-2 ({OPENSSL_VERSION}), hardware accelerated hashing is unavailable."
+    )
+
+
+def _hash_file(for_file_path: str, algorithms: Sequence[str]) -> dict[str, str]:
+    """Hash a file with one or more algorithms in a single pass over its contents.
+
+    The file is memory-mapped when large enough to avoid per-chunk copies.
+
+    Args:
+        for_file_path: Path to the file.
+        algorithms: The hashlib algorithm names, i.e. ("sha256", "sha512").
+
+    Returns:
+        A mapping of algorithm name to its hexadecimal digest.
+    """
+    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    updaters = [hasher.update for hasher in hashers.values()]
+
+    # unbuffered, reads go straight into our own buffer
+    with open(for_file_path, "rb", buffering=0) as f:
+        mm = None
+        if fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            try:
+                mm = mmap(f.fileno(), 0, access=ACCESS_READ)
+            except (OSError, ValueError):
+                # some filesystems reject mmap, fall back to the read loop below
+                mm = None
+
+        if mm is not None:
+            try:
+                if MADV_SEQUENTIAL is not None:
+                    # hashing reads front to back once, let the kernel read ahead aggressively
+                    mm.madvise(MADV_SEQUENTIAL)
+                # slices are released as soon as they are hashed, even on error, so close() never
+                # finds an exported buffer
+                with memoryview(mm) as view:
+                    for offset in range(0, len(view), MMAP_SLICE_SIZE):
+                        with view[offset : offset + MMAP_SLICE_SIZE] as chunk:
+                            for update in updaters:
+                                update(chunk)
+            finally:
+                mm.close()
+        else:
+            buffer = bytearray(CHUNK_SIZE)
+            with memoryview(buffer) as view:
+                while size := f.readinto(buffer):
+                    with view[:size] as chunk:
+                        for update in updaters:
+                            update(chunk)
+
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+
+async def compute_hashes(for_file_path: str, algorithms: Sequence[str] = ("sha256", "sha512")) -> dict[str, str]:
+    """
+    Asynchronously compute several hashes of a file while reading it only once.
+
+    Args:
+        for_file_path: Path to the file.
+        algorithms: The hashlib algorithm names to compute. Defaults to SHA-256 and SHA-512.
+
+    Returns:
+        A mapping of algorithm name to its hexadecimal digest.
+    """
+    try:
+        digests = await asyncio.to_thread(_hash_file, for_file_path, algorithms)
+        if is_verbose():
+            for algorithm, digest in digests.items():
+                LOGGER.info(f"{algorithm} for {for_file_path}: {digest}")
+        return digests
+    except FileNotFoundError:
+        LOGGER.error(f"File not found: {for_file_path}")
+        raise
+    except Exception as e:
+        LOGGER.error(f"Error computing {', '.join(algorithms)} for {for_file_path}: {e}")
+        raise
+
+
 async def compute_sha256(for_file_path: str) -> str:
     """
     Asynchronously compute the SHA-256 hash of a file.
@@ -24,17 +125,11 @@ async def compute_sha256(for_file_path: str) -> str:
     Returns:
         The SHA-256 hash as a hexadecimal string.
     """
-    hash_sha256 = sha256()
     try:
-        async with aiofiles_open(for_file_path, "rb") as f:
-            while True:
-                chunk = await f.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                hash_sha256.update(chunk)
+        digest = (await asyncio.to_thread(_hash_file, for_file_path, ("sha256",)))["sha256"]
         if is_verbose():
-            LOGGER.info(f"SHA-256 for {for_file_path}: {hash_sha256.hexdigest()}")
-        return hash_sha256.hexdigest()
+            LOGGER.info(f"SHA-256 for {for_file_path}: {digest}")
+        return digest
     except FileNotFoundError:
         LOGGER.error(f"File not found: {for_file_path}")
         raise
@@ -57,8 +152,8 @@ async def verify_sha256(for_file_path: str, expected_hash: str) -> bool:
     try:
         # get the computed hash
         computed_hash = await compute_sha256(for_file_path)
-        # normalize to lowercase for comparison
-        if computed_hash.lower() == expected_hash.lower():
+        # hexdigest() is already lowercase, normalize the expected hash and compare in constant time
+        if compare_digest(computed_hash, expected_hash.lower()):
             if is_verbose():
                 LOGGER.info(f"Hash match for {for_file_path}")
             return True
@@ -80,8 +175,7 @@ def validate_sha256(sha256: str) -> bool:
         bool: True if the checksum is valid, False otherwise.
     """
 
-    pattern = r"^[a-fA-F0-9]{64}$"
-    return bool(match(pattern, sha256))
+    return len(sha256) == 64 and _HEX_CHARS.issuperset(sha256)
 
 
 async def compute_sha512(for_file_path: str) -> str:
@@ -94,17 +188,11 @@ async def compute_sha512(for_file_path: str) -> str:
         The SHA-512 hash as a hexadecimal string.
     """
 
-    hash_sha512 = sha512()
     try:
-        async with aiofiles_open(for_file_path, "rb") as f:
-            while True:
-                chunk = await f.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                hash_sha512.update(chunk)
+        digest = (await asyncio.to_thread(_hash_file, for_file_path, ("sha512",)))["sha512"]
         if is_verbose():
-            LOGGER.info(f"SHA-512 for {for_file_path}: {hash_sha512.hexdigest()}")
-        return hash_sha512.hexdigest()
+            LOGGER.info(f"SHA-512 for {for_file_path}: {digest}")
+        return digest
     except FileNotFoundError:
         LOGGER.error(f"File not found: {for_file_path}")
         raise
@@ -127,8 +215,8 @@ async def verify_sha512(for_file_path: str, expected_hash: str) -> bool:
     try:
         # get the computed hash
         computed_hash = await compute_sha512(for_file_path)
-        # normalize to lowercase for comparison
-        if computed_hash.lower() == expected_hash.lower():
+        # hexdigest() is already lowercase, normalize the expected hash and compare in constant time
+        if compare_digest(computed_hash, expected_hash.lower()):
             if is_verbose():
                 LOGGER.info(f"Hash match for {for_file_path}")
             return True
@@ -140,6 +228,45 @@ async def verify_sha512(for_file_path: str, expected_hash: str) -> bool:
         return False
 
 
+def verify_sha256_signature(public_key_pem: str, signature: bytes, digest: bytes) -> bool:
+    """
+    Verify a signature made over a SHA-256 digest, as `openssl dgst -sha256 -sign` produces.
+
+    The caller hashes the signed data itself so large files are never read a second time.
+
+    Args:
+        public_key_pem: The signer's PEM encoded RSA or EC public key.
+        signature: The raw (DER/PKCS#1) signature bytes.
+        digest: The SHA-256 digest of the signed data.
+    Returns:
+        True if the signature is valid, False otherwise.
+    """
+    # imported here, cryptography is slow to import and only needed for signature checks
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+    try:
+        public_key = serialization.load_pem_public_key(public_key_pem.encode())
+        prehashed = Prehashed(hashes.SHA256())
+        if isinstance(public_key, rsa.RSAPublicKey):
+            public_key.verify(signature, digest, padding.PKCS1v15(), prehashed)
+        elif isinstance(public_key, ec.EllipticCurvePublicKey):
+            public_key.verify(signature, digest, ec.ECDSA(prehashed))
+        else:
+            LOGGER.error(f"Unsupported public key type for signature verification: {type(public_key).__name__}")
+            return False
+    except InvalidSignature:
+        LOGGER.warning("Signature verification failed: signature does not match")
+        return False
+    except Exception as e:
+        LOGGER.error(f"Error verifying signature: {e}")
+        return False
+
+    return True
+
+
 def validate_sha512(sha512: str) -> bool:
     """Validates the SHA-512 checksum format.
 
@@ -150,8 +277,7 @@ def validate_sha512(sha512: str) -> bool:
         bool: True if the checksum is valid, False otherwise.
     """
 
-    pattern = r"^[a-fA-F0-9]{128}$"
-    return bool(match(pattern, sha512))
+    return len(sha512) == 128 and _HEX_CHARS.issuperset(sha512)
 
 
 async def cert_sha256_fingerprint(path: str, colon: bool = True, upper: bool = True):
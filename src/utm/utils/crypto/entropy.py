@@ -1,5 +1,12 @@
 from math import log2
 
+# Character sets used to determine the pool size
+_DIGITS = frozenset("0123456789")
+_LOWERCASE = frozenset("abcdefghijklmnopqrstuvwxyz")
+_UPPERCASE = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_SPECIAL = frozenset("!@#$%^&*()-_=+[]{}|;:,.<>?/~`")
+_CHAR_SETS = (_DIGITS, _LOWERCASE, _UPPERCASE, _SPECIAL)
+
 
 def password_entropy(password: str) -> float:
     """Calculates the entropy of a password based on character variety and length.
@@ -15,20 +22,13 @@ def password_entropy(password: str) -> float:
     if not password:
         return 0.0
 
-    # Define character sets
-    char_sets = {
-        "digits": set("0123456789"),
-        "lowercase": set("abcdefghijklmnopqrstuvwxyz"),
-        "uppercase": set("ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
-        "special": set("!@#$%^&*()-_=+[]{}|;:,.<>?/~`"),
-    }
-
-    # Determine which character sets are used in the password
-    used_char_sets = [s for s in char_sets.values() if any(c in s for c in password)]
-    pool_size = sum(len(s) for s in used_char_sets)
+    # Determine which character sets are used in the password, hashing its characters once
+    chars = set(password)
+    pool_size = sum(len(s) for s in _CHAR_SETS if not s.isdisjoint(chars))
 
     # Calculate entropy
-    entropy = log2(pool_size ** len(password)) if pool_size > 0 else 0.0
+    # log2(pool_size^length) == length * log2(pool_size), without building a huge int first
+    entropy = len(password) * log2(pool_size) if pool_size > 0 else 0.0
     return entropy
 
 
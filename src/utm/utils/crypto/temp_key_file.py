@@ -1,12 +1,66 @@
 import os
 import atexit
 import signal
-import tempfile
 from pathlib import Path
+from typing import Any, TYPE_CHECKING
+from weakref import WeakSet
 from types import FrameType
+from secrets import token_hex
 
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePrivateKey
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePrivateKey
+
+ZERO_FILL_CHUNK = 64 * 1024  # 64 KiB
+_ZEROS = memoryview(bytes(ZERO_FILL_CHUNK))
+_CREATE_FLAGS = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_CLOEXEC", 0)
+
+# shared by every TempKeyFile so there is one atexit hook and one handler per signal however many keys exist
+_LIVE_KEY_FILES: "WeakSet[TempKeyFile]" = WeakSet()
+_PREV_HANDLERS: dict[int, Any] = {}
+_atexit_registered = False
+
+
+def _zero_fill(fd: int) -> None:
+    """Overwrite the file behind `fd` with zeros and flush it to disk."""
+    remaining = os.fstat(fd).st_size
+    offset = 0
+    while offset < remaining:
+        offset += os.pwrite(fd, _ZEROS[: min(remaining - offset, ZERO_FILL_CHUNK)], offset)
+    os.fsync(fd)
+
+
+def _cleanup_all() -> None:
+    for key_file in list(_LIVE_KEY_FILES):
+        key_file._cleanup()
+
+
+def _signal_handler(signum: int, frame: FrameType | None) -> None:
+    _cleanup_all()
+
+    # hand the signal on to whatever was installed before us
+    prev = _PREV_HANDLERS.get(signum)
+    if callable(prev):
+        prev(signum, frame)
+    elif prev != signal.SIG_IGN:
+        # SIG_DFL (or a handler not installed from Python), restore it and re-deliver the signal
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+
+def _register_cleanup_handlers() -> None:
+    global _atexit_registered
+
+    if not _atexit_registered:
+        atexit.register(_cleanup_all)
+        _atexit_registered = True
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        if sig in _PREV_HANDLERS:
+            continue
+        try:
+            _PREV_HANDLERS[sig] = signal.signal(sig, _signal_handler)
+        except Exception:
+            pass  # i.e. not on the main thread, try again on the next enter
 
 
 class TempKeyFile:
@@ -16,87 +70,152 @@ class TempKeyFile:
 
     This is useful for passing private keys to external tools that require
     a file path, while minimizing the risk of leaving sensitive data on disk.
+
+    On Linux the key is kept in an anonymous RAM-backed file (memfd_create) and
+    exposed as /proc/<pid>/fd/<fd>, so it never touches the disk at all. If memfd
+    is unavailable an unnamed O_TMPFILE is used the same way, and other platforms fall
+    back to a named temporary file. Both are zeroed on cleanup.
     """
 
     def __init__(
         self,
-        key_input: bytes | bytearray | EllipticCurvePrivateKey,
+        key_input: "bytes | bytearray | EllipticCurvePrivateKey",
         prefix: str = "safe-pc-key-",
         suffix: str = ".pem",
+        durable: bool = False,
     ):
         """
         key_input may be:
           - bytes (already PEM-encoded)
           - a cryptography private key object (e.g., EllipticCurvePrivateKey)
+
+        durable: fsync the key file after writing. The file is removed on exit so this
+        is off by default, a disk flush buys nothing for an ephemeral key.
         """
         if isinstance(key_input, (bytes, bytearray)):
             self.key_bytes = bytes(key_input)
-        elif isinstance(key_input, EllipticCurvePrivateKey):
+        else:
+            # cryptography is only needed to serialize key objects, keep it off the import path otherwise
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePrivateKey
+
+            if not isinstance(key_input, EllipticCurvePrivateKey):
+                raise TypeError(f"Unsupported type for key_input: {type(key_input)}")
             self.key_bytes = key_input.private_bytes(
                 encoding=serialization.Encoding.PEM,
                 format=serialization.PrivateFormat.TraditionalOpenSSL,
                 encryption_algorithm=serialization.NoEncryption(),
             )
-        else:
-            raise TypeError(f"Unsupported type for key_input: {type(key_input)}")
 
         self.prefix = prefix
         self.suffix = suffix
+        self.durable = durable
         self._path: Path | None = None
-        self._registered = False
+        self._memfd: int | None = None
+        self._anon_fd: int | None = None
 
-    def _make_tempfile(self) -> Path:
-        fd, path_str = tempfile.mkstemp(prefix=self.prefix, suffix=self.suffix)
+    def _write_all(self, fd: int) -> None:
+        # a single write almost always suffices, loop in case it is short
+        view = memoryview(self.key_bytes)
+        while view:
+            view = view[os.write(fd, view) :]
+
+    def _make_memfd(self) -> Path:
+        fd = os.memfd_create(self.prefix, os.MFD_CLOEXEC)
         try:
-            # write and flush then close handle so other code can open it
-            os.write(fd, self.key_bytes)
-            os.fsync(fd)
+            # memfds start out 0777, lock it down before the key is written
+            os.fchmod(fd, 0o600)
+            self._write_all(fd)
         except Exception:
             os.close(fd)
-            os.unlink(path_str)
             raise
-        finally:
+        self._memfd = fd
+        # /proc/<pid> rather than /proc/self so child processes can open it too
+        return Path(f"/proc/{os.getpid()}/fd/{fd}")
+
+    def _make_anonymous_tempfile(self) -> Path:
+        from tempfile import gettempdir
+
+        # O_TMPFILE creates an already-unlinked file in one syscall, there is no name to collide on or leak
+        fd = os.open(gettempdir(), os.O_TMPFILE | os.O_RDWR | getattr(os, "O_CLOEXEC", 0), 0o600)
+        try:
+            self._write_all(fd)
+        except Exception:
             os.close(fd)
+            raise
+        self._anon_fd = fd
+        return Path(f"/proc/{os.getpid()}/fd/{fd}")
 
-        p = Path(path_str)
+    def _make_tempfile(self) -> Path:
+        if not self.durable and hasattr(os, "memfd_create"):
+            try:
+                return self._make_memfd()
+            except OSError:
+                pass  # i.e. blocked by a seccomp filter, fall back to a file on disk
 
+        if not self.durable and hasattr(os, "O_TMPFILE"):
+            try:
+                return self._make_anonymous_tempfile()
+            except OSError:
+                pass  # the temp filesystem doesn't support O_TMPFILE, fall back to a named file
+
+        from tempfile import gettempdir
+
+        # O_EXCL + 0o600 creates the file already locked to the current user, no chmod needed
+        path_str = os.path.join(gettempdir(), f"{self.prefix}{token_hex(8)}{self.suffix}")
+        fd = os.open(path_str, _CREATE_FLAGS, 0o600)
         try:
-            p.chmod(0o600)
+            # write then close handle so other code can open it
+            self._write_all(fd)
+            if self.durable:
+                os.fsync(fd)
         except Exception:
-            pass
+            os.unlink(path_str)
+            raise
+        finally:
+            os.close(fd)
 
-        return p
+        return Path(path_str)
 
     def __enter__(self) -> Path:
         self._path = self._make_tempfile()
 
-        # ensure cleanup on normal program exit
-        if not self._registered:
-            atexit.register(self._cleanup)
-            # also handle signals
-            for sig in (signal.SIGINT, signal.SIGTERM):
-                try:
-                    signal.signal(sig, self._signal_handler)
-                except Exception:
-                    pass
-            self._registered = True
+        # ensure cleanup on normal program exit and on SIGINT/SIGTERM
+        _LIVE_KEY_FILES.add(self)
+        _register_cleanup_handlers()
 
         return self._path
 
-    def _signal_handler(self, signum: int, frame: FrameType | None) -> None:
-        self._cleanup()
-        # re-raise default behavior after cleanup
-        raise SystemExit(0)
-
     def _cleanup(self):
-        if self._path and self._path.exists():
+        _LIVE_KEY_FILES.discard(self)
+        if self._memfd is not None:
+            # nothing on disk, closing the last reference frees the memory
+            try:
+                os.close(self._memfd)
+            except OSError:
+                pass
+            self._memfd = None
+        elif self._anon_fd is not None:
+            # unlinked already, zero the blocks before the last reference is dropped (best-effort)
+            try:
+                _zero_fill(self._anon_fd)
+            except OSError:
+                pass
+            try:
+                os.close(self._anon_fd)
+            except OSError:
+                pass
+            self._anon_fd = None
+        elif self._path and self._path.exists():
             try:
                 # attempt to zero file contents before unlinking (best-effort)
                 try:
                     with open(self._path, "r+b") as f:
-                        length = f.seek(0, os.SEEK_END)
+                        remaining = f.seek(0, os.SEEK_END)
                         f.seek(0)
-                        f.write(b"\x00" * (length if length else 0))
+                        # fixed size writes so memory use doesn't scale with the file
+                        while remaining > 0:
+                            remaining -= f.write(_ZEROS[: min(remaining, ZERO_FILL_CHUNK)])
                         f.flush()
                         os.fsync(f.fileno())
                 except Exception:
@@ -113,3 +232,8 @@ class TempKeyFile:
         tb: object | None,
     ) -> None:
         self._cleanup()
+
+    def __del__(self) -> None:
+        # the live set only holds weak references, don't leave the key behind if we are collected first
+        if hasattr(self, "_memfd"):
+            self._cleanup()
@@ -1,5 +1,7 @@
-import errno
 import traceback
+from os import replace
+from hashlib import sha256
+from hmac import compare_digest
 from pathlib import Path
 from httpx import AsyncClient
 from logging import getLogger
@@ -8,8 +10,6 @@ from tempfile import TemporaryDirectory
 from contextlib import asynccontextmanager
 from collections.abc import Callable, Awaitable
 
-from utm.utils import compute_sha256
-
 from aiofiles import open as aio_open
 from tqdm.asyncio import tqdm_asyncio
 
@@ -75,6 +75,7 @@ async def _single_downloader_async(
     size: int,
     on_update: Callable[[int, int, str], Any] | None = None,
     iso: IsoType = PROXMOX_ISO,
+    hasher: Any | None = None,
 ):
     downloaded = 0
     use_progress = on_update is None
@@ -88,6 +89,8 @@ async def _single_downloader_async(
                     continue
                 buffer.extend(chunk)
                 if len(buffer) >= BUFFER_SIZE:
+                    if hasher is not None:
+                        hasher.update(buffer)
                     await file.write(buffer)
                     downloaded = await _update_progress(
                         len(buffer),
@@ -101,6 +104,8 @@ async def _single_downloader_async(
                     buffer.clear()
 
             if buffer:
+                if hasher is not None:
+                    hasher.update(buffer)
                 await file.write(buffer)
                 downloaded = await _update_progress(
                     len(buffer),
@@ -125,6 +130,7 @@ async def handle_download(
     dest_path: Path,
     on_update: Callable[[int, int, str], Any] | None = None,
     iso: IsoType = PROXMOX_ISO,
+    hasher: Any | None = None,
 ):
     """
     Asynchronously downloads a file from the specified URL to the given destination path.
@@ -134,6 +140,8 @@ async def handle_download(
         url (str): The URL of the file to download.
         dest_path (Path): The local filesystem path where the downloaded file will be saved.
         on_update (Callable | None, optional): An optional callback function for progress updates. Defaults to None.
+        hasher (hashlib hash | None, optional): If provided, updated with every byte written so the file's digest
+            is available as soon as the download completes, without re-reading it. Defaults to None.
     Raises:
         Exception: Propagates any exception encountered during the download process after logging and cleanup.
 
@@ -150,7 +158,7 @@ async def handle_download(
 
         # dest_path.parent.mkdir(parents=True, exist_ok=True)
         LOGGER.info(f"Starting download: {url} to {dest_path} ({size} bytes)")
-        await _single_downloader_async(url, dest_path, size, on_update, iso)
+        await _single_downloader_async(url, dest_path, size, on_update, iso, hasher)
         LOGGER.info(msg=f"Download complete: {dest_path}")
     except Exception as e:
         LOGGER.error(f"Download failed: {e}")
@@ -159,18 +167,22 @@ async def handle_download(
         raise
 
 
-def need_to_download(iso_path: Path, expected_sha256: str) -> bool:
-    """Determines if the ISO needs to be downloaded based on its existence and
+def need_to_download(iso_path: Path, expected_sha256: str, expected_size: int | None = None) -> bool:
+    """Determines if the ISO needs to be downloaded based on its existence, size and
     SHA-256 checksum.
 
     Args:
         iso_path (Path): The path to the ISO file.
         expected_sha256 (str): The expected SHA-256 checksum.
+        expected_size (int | None, optional): The expected size in bytes, if known. A size mismatch skips
+            reading the hash file entirely. Defaults to None.
 
     Returns:
         bool: True if the ISO needs to be downloaded, False otherwise.
     """
-    if not iso_path.exists():
+    try:
+        iso_stat = iso_path.stat()
+    except FileNotFoundError:
         # if the file ends in a .bz2, check for the decompressed version too
         if iso_path.suffix == ".bz2" and (
             iso_path.with_suffix("").exists() or iso_path.with_suffix("").with_suffix(".iso").exists()
@@ -180,11 +192,22 @@ def need_to_download(iso_path: Path, expected_sha256: str) -> bool:
         LOGGER.info(f"ISO does not exist at {iso_path}, need to download.")
         return True
 
+    if expected_size and iso_stat.st_size != expected_size:
+        LOGGER.warning(f"Existing ISO is {iso_stat.st_size} bytes, expected {expected_size}, need to re-download.")
+        return True
+
     LOGGER.info(f"ISO already exists at {iso_path}, verifying SHA-256...")
     hash_file = iso_path.with_name(iso_path.name.replace(".iso", "") + ".sha256")
     LOGGER.info(f"Looking for existing hash file at {hash_file}...")
 
-    existing_hash = hash_file.read_text().strip() if hash_file.exists() else ""
+    try:
+        # the hash file is written after the ISO is moved into place, if the ISO is newer it was changed since
+        if hash_file.stat().st_mtime < iso_stat.st_mtime:
+            LOGGER.warning("Existing hash file is older than the ISO, need to re-download.")
+            return True
+        existing_hash = hash_file.read_text().strip()
+    except FileNotFoundError:
+        existing_hash = ""
 
     if existing_hash.lower() == expected_sha256.lower():
         LOGGER.info("Existing ISO is valid, no need to re-download.")
@@ -203,7 +226,7 @@ class ISODownloader:
 
     def __init__(
         self,
-        get_iso_info: Callable[[], Awaitable[tuple[str, str]]],
+        get_iso_info: Callable[[], Awaitable[tuple[str, str] | tuple[str, str, int]]],
         dest_dir: Path,
         on_update: Callable[[int, int, str], None] | None = None,
     ):
@@ -215,13 +238,16 @@ class ISODownloader:
         self.on_update = on_update
         self.expected_sha256 = None
         self.get_iso_info = get_iso_info
-        self.temp_dir = TemporaryDirectory()
+        # stage downloads inside dest_dir so moving the verified ISO into place is a same-filesystem rename
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir = TemporaryDirectory(prefix=".iso-dl-", dir=self.dest_dir)
 
     async def run(self, dl_if_exists: bool = False, iso: IsoType = PROXMOX_ISO) -> "ISODownloader":
         """Perform the full download + verify process manually."""
         try:
 
-            url, self.expected_sha256 = await self.get_iso_info()
+            # get_iso_info may optionally return the expected size as a third element
+            url, self.expected_sha256, *expected_size = await self.get_iso_info()
             if not url:
                 raise ISODownloadError("Failed to resolve ISO download URL")
 
@@ -230,7 +256,9 @@ class ISODownloader:
 
             LOGGER.info(f"Checking if ISO needs to be downloaded at {self.dest_dir / self.iso_name}...")
 
-            if not dl_if_exists and not need_to_download(self.dest_dir / self.iso_name, self.expected_sha256):
+            if not dl_if_exists and not need_to_download(
+                self.dest_dir / self.iso_name, self.expected_sha256, expected_size[0] if expected_size else None
+            ):
                 LOGGER.info("ISO already exists and is valid, skipping download.")
                 self.verified = True
                 self._cleanup()
@@ -241,10 +269,12 @@ class ISODownloader:
             # ensure the destination directory exists
             self.dest_dir.mkdir(parents=True, exist_ok=True)
 
-            await handle_download(url, self.iso_path, self.on_update, iso)
-            actual_hash = await compute_sha256(str(self.iso_path))
+            # hash the bytes as they are written rather than re-reading the ISO afterwards
+            hasher = sha256()
+            await handle_download(url, self.iso_path, self.on_update, iso, hasher)
+            actual_hash = hasher.hexdigest()
 
-            if actual_hash.lower() != self.expected_sha256.lower():
+            if not compare_digest(actual_hash, self.expected_sha256.lower()):
                 LOGGER.error("SHA256 mismatch, possible tampering")
                 raise ISODownloadError("Checksum verification failed")
 
@@ -264,22 +294,14 @@ class ISODownloader:
         if self.verified and self.iso_path and self.expected_sha256:
             self.dest_path = self.dest_dir / Path(self.iso_path).name
             LOGGER.info(f"Moving verified ISO to {self.dest_path}")
-            self.dest_dir.mkdir(parents=True, exist_ok=True)
-
-            try:
-                Path(self.iso_path).replace(self.dest_path)
-            except OSError as e:
-                if e.errno == errno.EXDEV:
-                    # Handle cross-device move
-                    import shutil
 
-                    shutil.copy2(self.iso_path, self.dest_path)
-                    Path(self.iso_path).unlink()
-                else:
-                    LOGGER.error(f"Failed to move ISO to destination: {e}")
-                    raise
+            Path(self.iso_path).replace(self.dest_path)
 
-            (self.dest_path.with_suffix(".sha256")).write_text(self.expected_sha256)
+            # write the hash file next to the ISO and rename it into place so readers never see a partial hash
+            hash_file = self.dest_path.with_suffix(".sha256")
+            tmp_hash_file = Path(self.temp_dir.name) / hash_file.name
+            tmp_hash_file.write_text(self.expected_sha256)
+            replace(tmp_hash_file, hash_file)
 
         self.temp_dir.cleanup()
 
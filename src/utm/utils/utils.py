@@ -1,21 +1,48 @@
 import bz2
 import asyncio
 from typing import Any
+from hashlib import sha256
 from pathlib import Path
 from time import monotonic
-from logging import getLogger
-from httpx import AsyncClient
-from os import environ, write
+from sys import exit
+from functools import lru_cache, wraps
+from contextlib import nullcontext
+from httpx import AsyncClient, HTTPStatusError, TransportError
+from os import cpu_count, environ, write
+from shutil import which
+from tempfile import TemporaryFile
+from subprocess import PIPE, Popen
 from re import compile as re_compile
 from collections.abc import Callable
 from logging import Logger, getLogger, INFO
-from socket import gethostname, gethostbyname
+from socket import AF_INET, getaddrinfo, gethostname
 
 import pexpect
 
 
+__all__ = [
+    "PexpectLogger",
+    "send_key_to_pexpect_proc",
+    "pexpect_connect_to_serial_socket",
+    "strip_ansi_escape_sequences",
+    "split_incomplete_ansi_escape",
+    "get_local_ip",
+    "handle_keyboard_interrupt",
+    "calculate_percentage",
+    "fetch_text_from_url",
+    "remove_bz2_compression",
+    "decompress_and_hash_bz2",
+]
+
 LOGGER = getLogger(__name__)
 BUFFER = 2048
+BZ2_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+FETCH_ATTEMPTS = 3
+FETCH_BACKOFF_BASE = 0.2  # seconds, doubled after each failed attempt
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+ANSI_ESCAPE_PATTERN = re_compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+INCOMPLETE_ANSI_ESCAPE_PATTERN = re_compile(r"\x1B(\[[0-?]*[ -/]*)?")
+ANSI_ESCAPE_MAX_HOLD = 32  # longest partial escape sequence held back between reads
 
 
 class PexpectLogger:
@@ -111,13 +138,37 @@ def strip_ansi_escape_sequences(text: str) -> str:
         str: The text with ANSI escape sequences removed.
     """
 
-    ansi_escape = re_compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
-    return ansi_escape.sub("", text)
+    return ANSI_ESCAPE_PATTERN.sub("", text)
+
+
+def split_incomplete_ansi_escape(text: str) -> tuple[str, str]:
+    """Split a trailing, cut off ANSI escape sequence from text read in chunks.
 
+    Stripping each chunk as it arrives, instead of re-stripping the whole accumulated
+    buffer, only works if an escape sequence split across two reads is held back until
+    the rest of it arrives.
 
+    Args:
+        text (str): The text read so far, including anything held back last time.
+    Returns:
+        tuple[str, str]: The text safe to strip now and the incomplete sequence to prepend
+            to the next chunk.
+    """
+    idx = text.rfind("\x1b")
+    # no escape, or anything but the start of a CSI sequence we strip that could still be completed
+    # (a complete sequence, a non-CSI escape followed by text, something too long)
+    if idx == -1 or len(text) - idx > ANSI_ESCAPE_MAX_HOLD or not INCOMPLETE_ANSI_ESCAPE_PATTERN.fullmatch(text, idx):
+        return text, ""
+    return text[:idx], text[idx:]
+
+
+@lru_cache(maxsize=1)
 def get_local_ip() -> str:
     """Gets the local IP address of the machine.
 
+    The result is cached for the life of the process since resolving the hostname can
+    block on DNS, call `get_local_ip.cache_clear()` to re-resolve it.
+
     Returns:
         str: The local IP address.
     """
@@ -125,8 +176,9 @@ def get_local_ip() -> str:
     if env_ip and env_ip.strip() != "":
         return env_ip
     hostname = gethostname()
-    local_ip = gethostbyname(hostname)
-    return local_ip or "0.0.0.0"
+    addresses = getaddrinfo(hostname, None, family=AF_INET)
+    local_ip = addresses[0][4][0] if addresses else ""
+    return str(local_ip) or "0.0.0.0"
 
 
 def handle_keyboard_interrupt(
@@ -149,6 +201,7 @@ def handle_keyboard_interrupt(
     ```
     """
 
+    @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         try:
             return func(*args, **kwargs)
@@ -167,34 +220,114 @@ def calculate_percentage(part: int, whole: int) -> int:
         whole (int): The whole value.
 
     Returns:
-        float: The calculated percentage. Returns 0.0 if `whole` is 0 to avoid division by zero.
+        int: The calculated percentage rounded half up. Returns 0 if `whole` is 0 to avoid division by zero.
     """
-    if whole == 0:
+    if not whole:
         return 0
-    return ((part / whole) * 100).__round__(0).__int__()
+    # integer math, no float division or rounding artifacts
+    return (part * 100 + whole // 2) // whole
+
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds, ignoring HTTP-date values."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
 
 
-async def fetch_text_from_url(url: str) -> str:
+async def fetch_text_from_url(url: str, attempts: int = FETCH_ATTEMPTS, client: AsyncClient | None = None) -> str:
     """Fetch text content from a URL asynchronously.
 
+    Transport errors, 429 and 5xx responses are retried with exponential backoff
+    (200 ms, 400 ms, 800 ms, ...), honoring a Retry-After header if present. Other
+    4xx responses are not retried.
+
     Args:
         url (str): The URL to fetch content from.
+        attempts (int): The maximum number of attempts before giving up.
+        client (AsyncClient | None): A client to reuse, so requests to the same host share its
+            connection pool. It is left open. Defaults to a new client for this call.
 
     Returns:
         str: The text content retrieved from the URL. Returns an empty string on failure.
     """
 
     try:
-        async with AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.text if response else ""
+        async with nullcontext(client) if client is not None else AsyncClient() as client:
+            for attempt in range(attempts):
+                delay = FETCH_BACKOFF_BASE * 2**attempt
+                try:
+                    response = await client.get(url)
+                    if response.status_code in RETRY_STATUS:
+                        delay = _retry_after_seconds(response.headers.get("Retry-After")) or delay
+                    response.raise_for_status()
+                    return response.text if response else ""
+                except (TransportError, HTTPStatusError) as e:
+                    retryable = isinstance(e, TransportError) or e.response.status_code in RETRY_STATUS
+                    if not retryable or attempt == attempts - 1:
+                        raise
+                    LOGGER.warning(f"Fetching {url} failed ({e}), retrying in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+        return ""
     except Exception as e:
 
         LOGGER.error(f"Failed to fetch text from {url}: {e}")
         return ""
 
 
+def _check_bz2_path(iso_path: Path) -> None:
+    # ensure the file exists
+    if not iso_path.exists():
+        raise FileNotFoundError(f"File not found: {iso_path}")
+
+    # remove the extension
+    if iso_path.suffix != ".bz2":
+        raise ValueError("File is not a .bz2 compressed file")
+
+
+def _parallel_bz2_command(iso_path: Path) -> list[str] | None:
+    """Get a command that decompresses `iso_path` to stdout on every core, None if no such tool is installed."""
+    jobs = str(cpu_count() or 1)
+    # lbzip2 splits any bz2 stream across threads, pbzip2 only speeds up files it compressed itself
+    if tool := which("lbzip2"):
+        return [tool, "-d", "-c", "-n", jobs, str(iso_path)]
+    if tool := which("pbzip2"):
+        return [tool, "-d", "-c", f"-p{jobs}", str(iso_path)]
+    return None
+
+
+def _decompress_bz2(iso_path: Path, update: Callable[[bytes], Any] | None = None) -> Path:
+    """Decompress `iso_path` next to itself, passing every decompressed chunk to `update` as it's written."""
+    decompressed_path = iso_path.with_suffix("")
+
+    def copy(read: Callable[[int], bytes], write_out: Callable[[bytes], Any]) -> None:
+        while data := read(BZ2_CHUNK_SIZE):
+            if update is not None:
+                update(data)
+            write_out(data)
+
+    with open(decompressed_path, "wb", buffering=BZ2_CHUNK_SIZE) as output_file:
+        command = _parallel_bz2_command(iso_path)
+        if command:
+            # the python bz2 module decompresses on a single core, the slowest part of preparing an image
+            # stderr goes to a file, a pipe nobody reads until stdout hits EOF could fill up and stall the tool
+            with TemporaryFile() as stderr_file:
+                with Popen(command, stdout=PIPE, stderr=stderr_file) as proc:
+                    copy(proc.stdout.read, output_file.write)  # type: ignore
+                if proc.returncode != 0:
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode(errors="replace").strip()
+                    raise OSError(f"{command[0]} failed ({proc.returncode}): {stderr}")
+        else:
+            with bz2.BZ2File(iso_path, "rb") as input_file:
+                copy(input_file.read, output_file.write)
+
+    # remove the original compressed file after successful write - not needed
+    iso_path.unlink(missing_ok=True)
+    return decompressed_path
+
+
 async def remove_bz2_compression(iso_path: Path) -> Path:
     """Remove compression from a file
 
@@ -208,26 +341,26 @@ async def remove_bz2_compression(iso_path: Path) -> Path:
     Returns:
         Path: The path to the decompressed file.
     """
+    _check_bz2_path(iso_path)
+    return await asyncio.to_thread(_decompress_bz2, iso_path)
 
-    # ensure the file exists
-    if not iso_path.exists():
-        raise FileNotFoundError(f"File not found: {iso_path}")
 
-    # remove the extension
-    if iso_path.suffix != ".bz2":
-        raise ValueError("File is not a .bz2 compressed file")
+async def decompress_and_hash_bz2(iso_path: Path) -> tuple[Path, bytes]:
+    """Remove compression from a file and SHA-256 hash the decompressed output in the same pass.
 
-    loop = asyncio.get_running_loop()
-    decompressed_path = iso_path.with_suffix("")
+    Each chunk is hashed right after it's decompressed instead of reading the whole file back afterwards.
 
-    def decompress() -> Path:
-        with bz2.BZ2File(iso_path, "rb") as input_file:
-            with open(decompressed_path, "wb") as output_file:
-                for data in iter(lambda: input_file.read(100 * 1024), b""):
-                    output_file.write(data)
+    Args:
+        iso_path (Path): The path to the compressed file.
 
-        # remove the original compressed file after successful write - not needed
-        iso_path.unlink(missing_ok=True)
-        return decompressed_path
+    Raises:
+        ValueError: if the file is not a .bz2 compressed file.
+        FileNotFoundError: if the file does not exist.
 
-    return await loop.run_in_executor(None, decompress)
+    Returns:
+        tuple[Path, bytes]: The path to the decompressed file and its raw SHA-256 digest.
+    """
+    _check_bz2_path(iso_path)
+    hasher = sha256()
+    decompressed_path = await asyncio.to_thread(_decompress_bz2, iso_path, hasher.update)
+    return decompressed_path, hasher.digest()
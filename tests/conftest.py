@@ -1,10 +1,11 @@
 from os import environ
 import pytest
 
-from utm.__main__ import setup_logging
+from utm.__main__ import setup_logging, refresh_env_flags
 
 
 @pytest.fixture(scope="session", autouse=True)
 def init_testing():
     environ["CAPSTONE_TESTING"] = "1"
+    refresh_env_flags()
     setup_logging()
@@ -0,0 +1,54 @@
+from hashlib import sha256
+from pathlib import Path
+
+import pytest
+
+from utm.utils.crypto import validate_sha256, validate_sha512, verify_sha256, verify_sha256_signature
+
+
+@pytest.mark.parametrize("digest", ["a" * 64, "0123456789abcdefABCDEF" * 2 + "0" * 20])
+def test_validate_sha256_valid(digest: str) -> None:
+    """Any 64 character hex string is a valid SHA-256 digest."""
+    assert validate_sha256(digest)
+
+
+@pytest.mark.parametrize("digest", ["", "a" * 63, "a" * 65, "g" * 64, "a" * 63 + "\n", " " + "a" * 63])
+def test_validate_sha256_invalid(digest: str) -> None:
+    """Wrong lengths and non-hex characters are rejected."""
+    assert not validate_sha256(digest)
+
+
+def test_validate_sha512() -> None:
+    """SHA-512 digests must be exactly 128 hex characters."""
+    assert validate_sha512("F" * 128)
+    assert not validate_sha512("F" * 127)
+    assert not validate_sha512("z" * 128)
+
+
+@pytest.mark.asyncio
+async def test_verify_sha256_is_case_insensitive(tmp_path: Path) -> None:
+    """Expected digests may be given in upper case."""
+    target = tmp_path / "file.bin"
+    target.write_bytes(b"safe-pc")
+    expected = sha256(b"safe-pc").hexdigest()
+
+    assert await verify_sha256(str(target), expected.upper())
+    assert not await verify_sha256(str(target), "0" * 64)
+
+
+def test_verify_sha256_signature_matches_openssl_dgst() -> None:
+    """A signature made like `openssl dgst -sha256 -sign` verifies against the data's digest only."""
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = (
+        private_key.public_key()
+        .public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        .decode()
+    )
+    signature = private_key.sign(b"safe-pc", padding.PKCS1v15(), hashes.SHA256())
+
+    assert verify_sha256_signature(public_pem, signature, sha256(b"safe-pc").digest())
+    assert not verify_sha256_signature(public_pem, signature, sha256(b"tampered").digest())
+    assert not verify_sha256_signature("not a key", signature, sha256(b"safe-pc").digest())
@@ -0,0 +1,33 @@
+from math import log2
+
+import pytest
+
+from utm.utils.crypto import password_entropy, is_high_entropy_password
+
+
+@pytest.mark.parametrize("password", ["a", "abc123", "aB3!", "UseBetterPassword!23", "x" * 500])
+def test_password_entropy_matches_pool_formula(password: str) -> None:
+    """Entropy should equal log2(pool_size^length) within floating point tolerance."""
+    pool_size = sum(
+        size
+        for size, chars in (
+            (10, "0123456789"),
+            (26, "abcdefghijklmnopqrstuvwxyz"),
+            (26, "ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+            (29, "!@#$%^&*()-_=+[]{}|;:,.<>?/~`"),
+        )
+        if any(c in chars for c in password)
+    )
+    assert password_entropy(password) == pytest.approx(log2(pool_size ** len(password)))
+
+
+def test_password_entropy_empty_and_unknown_chars() -> None:
+    """Empty passwords and characters outside every pool have no entropy."""
+    assert password_entropy("") == 0.0
+    assert password_entropy("    ") == 0.0
+
+
+def test_is_high_entropy_password() -> None:
+    """Threshold check uses the computed entropy."""
+    assert is_high_entropy_password("UseBetterPassword!23")
+    assert not is_high_entropy_password("password")
@@ -0,0 +1,60 @@
+import bz2
+from hashlib import sha256
+from pathlib import Path
+
+import pytest
+
+from utm.utils.utils import (
+    calculate_percentage,
+    decompress_and_hash_bz2,
+    strip_ansi_escape_sequences,
+    split_incomplete_ansi_escape,
+)
+
+
+@pytest.mark.parametrize(
+    ("part", "whole", "expected"),
+    [(0, 0, 0), (5, 0, 0), (0, 10, 0), (1, 3, 33), (2, 3, 67), (1, 8, 13), (10, 10, 100), (512, 1024, 50)],
+)
+def test_calculate_percentage(part: int, whole: int, expected: int) -> None:
+    """Percentages are whole numbers rounded half up, zero totals report 0%."""
+    assert calculate_percentage(part, whole) == expected
+
+
+def test_split_incomplete_ansi_escape_matches_whole_buffer_strip() -> None:
+    """Stripping chunk by chunk gives the same screen text as stripping everything at once."""
+    raw = "\x1b[2J\x1b[1;1HWelcome to the \x1b[7mOPNSense\x1b[0m installer\x1b[38;5;12mlogin:\x1b[0m"
+    for size in (1, 2, 3, 5, 8, 13):
+        screen, pending = "", ""
+        for start in range(0, len(raw), size):
+            text, pending = split_incomplete_ansi_escape(pending + raw[start : start + size])
+            screen += strip_ansi_escape_sequences(text)
+        assert pending == ""
+        assert screen == strip_ansi_escape_sequences(raw)
+
+
+@pytest.mark.parametrize("raw", ["foo\x1b(BPassword:", "ok\x1b7login:", "\x1b=Last Chance!"])
+def test_split_incomplete_ansi_escape_passes_non_csi_escapes(raw: str) -> None:
+    """A complete non-CSI escape right before a prompt does not hold the prompt back."""
+    assert split_incomplete_ansi_escape(raw) == (raw, "")
+
+
+@pytest.mark.parametrize(("raw", "held"), [("ok\x1b", "\x1b"), ("ok\x1b[", "\x1b["), ("ok\x1b[38;5", "\x1b[38;5")])
+def test_split_incomplete_ansi_escape_holds_cut_off_sequence(raw: str, held: str) -> None:
+    """Only the start of a CSI sequence that could still be completed is held back."""
+    assert split_incomplete_ansi_escape(raw) == (raw[: -len(held)], held)
+
+
+@pytest.mark.asyncio
+async def test_decompress_and_hash_bz2(tmp_path: Path) -> None:
+    """The digest is the SHA-256 of the decompressed file, multi-stream archives included."""
+    data = bytes(range(256)) * 8192 + b"\0" * (3 * 1024 * 1024)
+    compressed = tmp_path / "image.img.bz2"
+    compressed.write_bytes(bz2.compress(data) + bz2.compress(b"tail"))
+
+    decompressed, digest = await decompress_and_hash_bz2(compressed)
+
+    assert decompressed == tmp_path / "image.img"
+    assert decompressed.read_bytes() == data + b"tail"
+    assert digest == sha256(data + b"tail").digest()
+    assert not compressed.exists()